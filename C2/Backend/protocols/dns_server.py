@@ -6,15 +6,43 @@ Utilizes dnslib to parse and construct DNS queries and responses, supporting bas
 """
 #!/usr/bin/env python3
 
+import os
+import errno
 import socket
+import logging
+import selectors
 import subprocess
+import multiprocessing
+from functools import lru_cache
 from dnslib import DNSRecord, QTYPE, RR, A, DNSHeader
 from C2.Backend.utils.logging_config import loggers
-from C2.Backend.utils.auxiliary import is_port_in_use
+from C2.Backend.utils.mmsg import DatagramBatch
 
 # Logger instance for DNS server events
 dns_logger = loggers["dns"]
 
+# Fixed address returned for every A query
+FIXED_IP = "127.0.0.1"
+
+# Pre-packed pieces of the fixed reply: flags (QR, AA, RD, RA, as dnslib sets them) with
+# QDCOUNT=1, ANCOUNT=1, NSCOUNT=0, ARCOUNT=0, and an A answer pointing back at the question
+# name (TTL 60)
+REPLY_FLAGS_AND_COUNTS = b"\x85\x80\x00\x01\x00\x01\x00\x00\x00\x00"
+ANSWER_RECORD = b"\xc0\x0c\x00\x01\x00\x01\x00\x00\x00\x3c\x00\x04" + socket.inet_aton(FIXED_IP)
+
+# Largest query read from the socket
+MAX_QUERY_SIZE = 512
+
+# Longest the server loop blocks before re-checking a stop event that cannot wake the selector
+SELECT_TIMEOUT = 0.2
+
+# Number of processes answering on port 53. With more than one, every worker binds its
+# own SO_REUSEPORT socket and the kernel hashes incoming queries across them.
+DNS_WORKERS = int(os.getenv("C2_DNS_WORKERS", "1"))
+
+# Longest shutdown waits for worker processes to exit before terminating them
+WORKER_STOP_TIMEOUT = 5
+
 def stop_system_dns_service(service_name="systemd-resolved"):
     """
     Attempt to stop the specified DNS service to allow this server to bind to port 53.
@@ -43,6 +71,180 @@ def start_system_dns_service(service_name="systemd-resolved"):
     except subprocess.CalledProcessError as e:
         dns_logger.error(f"Failed to start {service_name}. Error: {e}")
 
+def build_reply(data: bytes) -> bytes:
+    """
+    Builds the DNS response for a single query packet.
+
+    Args:
+        data (bytes): The raw DNS query.
+
+    Returns:
+        bytes: The packed DNS reply answering with FIXED_IP.
+    """
+    request = DNSRecord.parse(data)
+    reply = DNSRecord(
+        DNSHeader(id=request.header.id, qr=1, aa=1, ra=1),
+        q=request.q
+    )
+
+    qname = request.q.qname
+    if dns_logger.isEnabledFor(logging.DEBUG):
+        dns_logger.debug("Query for %s type %s", qname, QTYPE[request.q.qtype])
+
+    reply.add_answer(RR(rname=qname, rtype=QTYPE.A, rclass=1, ttl=60, rdata=A(FIXED_IP)))
+    return reply.pack()
+
+def fast_reply(data: bytes):
+    """
+    Builds the fixed A-record reply with plain byte slicing instead of dnslib.
+
+    Handles the common case of a standard query with a single uncompressed
+    question; anything else returns None so the caller can fall back to dnslib.
+
+    Args:
+        data (bytes): The raw DNS query.
+
+    Returns:
+        bytes | None: The packed reply, or None if the query needs full parsing.
+    """
+    if len(data) < 17 or data[2] & 0xF8 or data[4:6] != b"\x00\x01":
+        return None  # Response/non-QUERY opcode, or not exactly one question
+
+    offset = 12
+    while (length := data[offset]) != 0:
+        if length & 0xC0:
+            return None  # Compression pointer in the question
+        offset += length + 1
+        if offset >= len(data):
+            return None
+    question_end = offset + 5  # Terminating zero label + QTYPE + QCLASS
+    if question_end > len(data):
+        return None
+
+    # One join allocates the reply once, where chained + would build three intermediates
+    return b"".join((data[:2], REPLY_FLAGS_AND_COUNTS, data[12:question_end], ANSWER_RECORD))
+
+@lru_cache(maxsize=4096)
+def reply_template(query_body: bytes) -> bytes:
+    """
+    Returns the serialized reply for a query, minus its 2-byte transaction ID.
+
+    Everything in a reply except the transaction ID is determined by the rest of
+    the query, so repeat queries are answered by prefixing the cached template with
+    the new ID, skipping dnslib parsing and packing entirely.
+
+    Args:
+        query_body (bytes): The raw query without its first two bytes.
+
+    Returns:
+        bytes: The packed reply without its first two bytes.
+    """
+    query = b"\x00\x00" + query_body
+    return (fast_reply(query) or build_reply(query))[2:]
+
+def serve_pending(sock, batch):
+    """
+    Answers every query currently queued on the non-blocking socket.
+
+    Draining the receive buffer on each readiness event means a burst of queries
+    costs one wakeup rather than one per packet, and each batch of queries is
+    read and answered with one system call per direction.
+
+    Args:
+        sock (socket.socket): The non-blocking UDP socket bound to port 53.
+        batch (DatagramBatch): Preallocated batch buffers owned by the server loop.
+    """
+    while True:
+        try:
+            queries = batch.recv(sock)
+        except BlockingIOError:
+            return
+
+        # Checked once per batch so production (INFO) runs never format debug messages
+        debug = dns_logger.isEnabledFor(logging.DEBUG)
+        replies = []
+        for data, addr in queries:
+            try:
+                if debug:
+                    dns_logger.debug("Received DNS query from %s", addr)
+                replies.append((data[:2] + reply_template(data[2:]), addr))
+            except Exception as e:
+                dns_logger.error(f"DNS server error: {e}")
+        batch.send(sock, replies)
+        if debug:
+            dns_logger.debug("Sent %d DNS replies with IP %s", len(replies), FIXED_IP)
+
+        if len(queries) < batch.size:
+            return  # Queue drained; skip the extra call that would only hit EAGAIN
+
+def bind_dns_socket(port: int, reuseport: bool = False) -> socket.socket:
+    """
+    Creates the non-blocking UDP socket the server answers on.
+
+    Args:
+        port (int): The port to bind.
+        reuseport (bool): Whether to set SO_REUSEPORT, so several workers can bind the port.
+
+    Returns:
+        socket.socket: The bound socket.
+
+    Raises:
+        OSError: If the port cannot be bound (EADDRINUSE if it is already taken).
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuseport:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(("", port))
+    except OSError:
+        sock.close()
+        raise
+    sock.setblocking(False)
+    return sock
+
+def serve_dns(sock, stop_event):
+    """
+    Answers queries on `sock` until `stop_event` is set.
+
+    Args:
+        sock (socket.socket): The bound, non-blocking UDP socket.
+        stop_event (threading.Event | StopEvent | multiprocessing.Event): The stop signal.
+    """
+    batch = DatagramBatch(buffer_size=MAX_QUERY_SIZE)
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    wakeup = hasattr(stop_event, "fileno")
+    if wakeup:
+        selector.register(stop_event, selectors.EVENT_READ)
+    timeout = None if wakeup else SELECT_TIMEOUT
+
+    try:
+        while not stop_event.is_set():
+            for key, _ in selector.select(timeout=timeout):
+                if key.fileobj is sock:
+                    serve_pending(sock, batch)
+    finally:
+        selector.close()
+
+def dns_worker(port: int, stop_event):
+    """
+    Entry point of a DNS worker process: answers on its own SO_REUSEPORT socket.
+
+    Args:
+        port (int): The port to bind.
+        stop_event (multiprocessing.Event): Set by the parent to stop the worker.
+    """
+    try:
+        sock = bind_dns_socket(port, reuseport=True)
+    except OSError as e:
+        dns_logger.error(f"DNS worker {os.getpid()} failed to bind port {port}: {e}")
+        return
+    try:
+        serve_dns(sock, stop_event)
+    finally:
+        sock.close()
+
 def start_dns_server(stop_event):
     """
     Starts a simple DNS server on UDP port 53.
@@ -51,58 +253,51 @@ def start_dns_server(stop_event):
     - Stops the default Ubuntu DNS service (systemd-resolved) to free port 53.
     - Listens for DNS queries and responds with a fixed IP address (127.0.0.1).
     - Utilizes dnslib to parse and construct DNS messages.
-    - Periodically checks `stop_event` for a graceful shutdown.
+    - Waits for readiness with a selector and drains all queued queries per wakeup,
+      reading and answering them in batches (recvmmsg/sendmmsg on Linux).
+    - With C2_DNS_WORKERS > 1, answers from that many processes (this thread and
+      DNS_WORKERS - 1 spawned workers) sharing the port through SO_REUSEPORT.
+    - Wakes immediately when `stop_event` is set (it is registered with the selector when it
+      has a `fileno()`, otherwise polled every SELECT_TIMEOUT seconds) for a graceful shutdown.
     - Restarts the default DNS service when the server stops.
 
     Args:
-        stop_event (threading.Event): An event object used to signal when the DNS server should stop.
+        stop_event (threading.Event | StopEvent): An event object used to signal when the DNS server should stop.
     """
     stop_system_dns_service("systemd-resolved")
 
     port = 53
-    if is_port_in_use(port):
-        dns_logger.error(f"Port {port} is still in use. DNS server will not start.")
-        start_system_dns_service("systemd-resolved")
-        return
-
     dns_logger.info("Starting DNS server on UDP port 53...")
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.bind(("", port))
-    except Exception as e:
-        dns_logger.error(f"Failed to bind DNS server to port {port}: {e}")
+        sock = bind_dns_socket(port, reuseport=DNS_WORKERS > 1)
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            dns_logger.error(f"Port {port} is still in use. DNS server will not start.")
+        else:
+            dns_logger.error(f"Failed to bind DNS server to port {port}: {e}")
         start_system_dns_service("systemd-resolved")
         return
 
-    sock.settimeout(1)
-    fixed_ip = "127.0.0.1"
+    workers = []
+    if DNS_WORKERS > 1:
+        ctx = multiprocessing.get_context("spawn")
+        workers_stop = ctx.Event()
+        workers = [ctx.Process(target=dns_worker, args=(port, workers_stop), daemon=True) for _ in range(DNS_WORKERS - 1)]
+        for worker in workers:
+            worker.start()
 
     dns_logger.info("DNS server is now running.")
     try:
-        while not stop_event.is_set():
-            try:
-                data, addr = sock.recvfrom(512)
-                dns_logger.debug(f"Received DNS query from {addr}")
-                request = DNSRecord.parse(data)
-                reply = DNSRecord(
-                    DNSHeader(id=request.header.id, qr=1, aa=1, ra=1),
-                    q=request.q
-                )
-
-                qname = request.q.qname
-                qtype = QTYPE[request.q.qtype]
-                dns_logger.debug(f"Query for {qname} type {qtype}")
-
-                reply.add_answer(RR(rname=qname, rtype=QTYPE.A, rclass=1, ttl=60, rdata=A(fixed_ip)))
-                sock.sendto(reply.pack(), addr)
-                dns_logger.debug(f"Sent DNS reply to {addr} with IP {fixed_ip}")
-            except socket.timeout:
-                continue
-            except Exception as e:
-                dns_logger.error(f"DNS server error: {e}")
+        serve_dns(sock, stop_event)
 
     finally:
         dns_logger.info("Stopping DNS server...")
         sock.close()
+        if workers:
+            workers_stop.set()
+            for worker in workers:
+                worker.join(timeout=WORKER_STOP_TIMEOUT)
+                if worker.is_alive():
+                    worker.terminate()
         dns_logger.info("DNS server stopped.")
         start_system_dns_service("systemd-resolved")
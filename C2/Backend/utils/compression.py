@@ -0,0 +1,106 @@
+"""
+C2.Backend.utils.compression.py
+
+ASGI middleware that transparently decompresses request bodies sent with a
+Content-Encoding of zstd or gzip, so route handlers and Pydantic models always
+see plain JSON regardless of how the agent encoded its upload.
+"""
+#!/usr/bin/env python3
+
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd bodies are rejected when the codec is not installed
+    zstandard = None
+
+# Upper bound for a decompressed request body, guarding against compression bombs
+MAX_DECOMPRESSED_SIZE = 16 * 1024 * 1024
+
+
+def decompress_body(body: bytes, encoding: str) -> bytes:
+    """
+    Decompress a request body according to its Content-Encoding.
+
+    Args:
+        body (bytes): The raw request body.
+        encoding (str): The Content-Encoding value ("zstd" or "gzip").
+
+    Returns:
+        bytes: The decompressed body.
+
+    Raises:
+        ValueError: If the encoding is unsupported or the output exceeds MAX_DECOMPRESSED_SIZE.
+    """
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(body, max_output_size=MAX_DECOMPRESSED_SIZE)
+    if encoding == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        data = decompressor.decompress(body, MAX_DECOMPRESSED_SIZE)
+        if decompressor.unconsumed_tail:
+            raise ValueError("Decompressed body too large")
+        return data
+    raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+
+class DecompressRequestMiddleware:
+    """
+    Decompresses zstd/gzip request bodies before they reach the application.
+    Requests without a Content-Encoding header pass through untouched.
+    """
+
+    def __init__(self, app):
+        """
+        Initializes the middleware.
+
+        Args:
+            app: The wrapped ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        """
+        Buffers and decompresses an encoded request body, then replays it to the app.
+
+        Responds with 415 if the body cannot be decoded.
+        """
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        encoding = headers.get(b"content-encoding", b"").decode().strip().lower()
+        if not encoding or encoding == "identity":
+            return await self.app(scope, receive, send)
+
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+
+        try:
+            body = decompress_body(b"".join(chunks), encoding)
+        except Exception:
+            await send({"type": "http.response.start", "status": 415, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ] + [(b"content-length", str(len(body)).encode())]
+        replayed = False
+
+        async def receive_decompressed():
+            """
+            Deliver the decompressed body once, then defer to the real channel.
+            """
+            nonlocal replayed
+            if replayed:
+                return await receive()
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app(scope, receive_decompressed, send)
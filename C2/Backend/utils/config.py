@@ -7,15 +7,41 @@ Reads the configuration from a YAML file and ensures required keys exist.
 #!/usr/bin/env python3
 
 import os
+import copy
 import yaml
 import logging
+from functools import lru_cache
 
 CONFIG_FILE = "C2/Backend/server_config.yaml"
 
+# Directory of task files for agents, shared over SMB as "TASKS" and served over HTTP at /tasks
+TASKS_DIR = "smb_tasks"
+
+# libyaml-backed loader when PyYAML was built with it, pure-Python otherwise
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 def load_config():
     """
     Loads and returns the server configuration from the YAML file in strict mode.
 
+    The file is read and parsed once per process; each call returns a deep copy
+    of the parsed values, so callers may modify the result (nested values
+    included) without affecting other callers.
+
+    Returns:
+        dict: A dictionary containing the server configuration parameters.
+
+    Raises:
+        TypeError: If the YAML content is not a dictionary.
+        SystemExit: If the configuration file is missing.
+    """
+    return copy.deepcopy(_read_config())
+
+@lru_cache(maxsize=1)
+def _read_config():
+    """
+    Reads and validates the configuration file.
+
     This function ensures that the configuration file exists and is properly formatted.
     It raises errors if required keys are missing to prevent misconfigurations.
 
@@ -31,7 +57,7 @@ def load_config():
         exit(1)
 
     with open(CONFIG_FILE, "r") as config_file:
-        config = yaml.safe_load(config_file)
+        config = yaml.load(config_file, Loader=YAML_LOADER)
 
     # Ensure the configuration is a dictionary
     if not isinstance(config, dict):
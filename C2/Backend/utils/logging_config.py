@@ -8,7 +8,10 @@ It ensures all logs are properly stored, formatted, and rotated, while also redi
 
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
+import queue
+import atexit
+import multiprocessing
+from logging.handlers import TimedRotatingFileHandler, WatchedFileHandler, QueueHandler, QueueListener
 from C2.Backend.utils.config import load_config
 
 # Load configuration settings
@@ -16,18 +19,67 @@ config = load_config()
 LOGGING_FILE_PATH = config['LOGGING_FILE_PATH']
 DEBUG_MODE = config['DEBUG_MODE']
 
+# Records waiting for the listener thread; once full, new records are dropped rather
+# than letting a burst grow memory without bound or block the logging caller
+LOG_QUEUE_SIZE = 100_000
+
+# Write buffer of the log file; it is flushed whenever the listener drains the queue
+LOG_BUFFER_SIZE = 64 * 1024
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    A QueueHandler that discards records when the bounded queue is full.
+    """
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+class BatchedFileHandler(TimedRotatingFileHandler):
+    """
+    A TimedRotatingFileHandler that writes through a LOG_BUFFER_SIZE buffer and only
+    flushes once the log queue is empty, so a burst of records reaches the disk in a
+    few large writes instead of one write per record.
+    """
+
+    def __init__(self, filename, log_queue, **kwargs):
+        """
+        Args:
+            filename (str): Path of the log file.
+            log_queue (queue.Queue): The queue the handler's records are drained from.
+            **kwargs: Passed through to TimedRotatingFileHandler.
+        """
+        self.log_queue = log_queue
+        super().__init__(filename, **kwargs)
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE,
+                    encoding=self.encoding, errors=self.errors)
+
+    def flush(self):
+        if self.log_queue.empty():
+            super().flush()
+
 def setup_logging():
     """
     Initializes the logging system and configures logging for various components.
 
     Features:
     - Creates separate loggers for different subsystems.
-    - Stores logs in a rotating file handler with daily log rotation.
+    - Stores logs in a rotating file handler with daily log rotation. Worker processes
+      (C2_HTTP_WORKERS, C2_DNS_WORKERS) append to the same file without rotating it and
+      reopen it after the main process rotates it, so only one process ever renames it.
+    - Hands records to a background listener thread through a bounded queue, so logging
+      calls never block on disk writes or rotation; records beyond LOG_QUEUE_SIZE are dropped.
+    - Buffers file writes and flushes them once per drained batch of records.
     - Configures Uvicorn logs to integrate seamlessly into the logging system.
     - Enables console logging in debug mode.
 
     Returns:
-        dict: A dictionary of configured loggers.
+        tuple: A dictionary of configured loggers, and the started QueueListener
+        that writes their records.
     """
     logs_dir = os.path.dirname(LOGGING_FILE_PATH)
     os.makedirs(logs_dir, exist_ok=True)
@@ -52,20 +104,33 @@ def setup_logging():
     console_handler = logging.StreamHandler()
     console_handler.setLevel(log_level)
 
-    # File logging with daily rotation
-    log_handler = TimedRotatingFileHandler(LOGGING_FILE_PATH, when="midnight", interval=1, backupCount=7)
-    log_handler.suffix = "%Y%m%d"
+    # Loggers format each record's message on the calling thread (QueueHandler.prepare)
+    # and enqueue it; the listener thread does the file and console I/O
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+
+    if multiprocessing.current_process().name != "MainProcess":
+        # Worker process: one unbuffered write per record, reopened once the file is rotated
+        log_handler = WatchedFileHandler(LOGGING_FILE_PATH)
+    else:
+        # File logging with daily rotation
+        log_handler = BatchedFileHandler(LOGGING_FILE_PATH, log_queue, when="midnight", interval=1, backupCount=7)
+        log_handler.suffix = "%Y%m%d"
 
     # Define log format
     log_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
     log_handler.setFormatter(log_formatter)
     console_handler.setFormatter(log_formatter)
 
+    queue_handler = DroppingQueueHandler(log_queue)
+    output_handlers = [log_handler]
+    if DEBUG_MODE:
+        output_handlers.append(console_handler)  # Enable console output in debug mode
+    listener = QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+    listener.start()
+
     # Attach handlers to loggers
     for logger in loggers.values():
-        logger.addHandler(log_handler)
-        if DEBUG_MODE:
-            logger.addHandler(console_handler)  # Enable console output in debug mode
+        logger.addHandler(queue_handler)
 
     # Redirect Uvicorn logs to custom logging system
     uvicorn_loggers = ["uvicorn", "uvicorn.access", "uvicorn.error"]
@@ -73,14 +138,30 @@ def setup_logging():
     for uvicorn_logger_name in uvicorn_loggers:
         uvicorn_logger = logging.getLogger(uvicorn_logger_name)
         uvicorn_logger.handlers.clear()  # Remove default handlers
-        uvicorn_logger.addHandler(log_handler)  # Redirect logs to file
+        uvicorn_logger.addHandler(queue_handler)  # Redirect logs to file
         uvicorn_logger.setLevel(log_level)  # Match log level
         uvicorn_logger.propagate = False  # Prevent logs from appearing in console
 
-    return loggers
+    return loggers, listener
 
 # Initialize and retrieve global logger instances
-loggers = setup_logging()
+loggers, log_listener = setup_logging()
+log_listener_running = True
+
+def stop_logging():
+    """
+    Stops the listener thread once every queued record is handled, then writes out
+    the file handler's buffer. Safe to call more than once.
+    """
+    global log_listener_running
+    if log_listener_running:
+        log_listener.stop()
+        log_listener_running = False
+    for handler in log_listener.handlers:
+        handler.flush()
+
+# Write out any queued records before the interpreter exits
+atexit.register(stop_logging)
 
 def configure_uvicorn_logging_ui():
     """
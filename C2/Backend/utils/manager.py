@@ -7,18 +7,74 @@ Ensures proper startup and graceful shutdown of all running protocols.
 """
 #!/usr/bin/env python3
 
+import os
+import atexit
+import socket
 import asyncio
 import concurrent.futures
 import threading
 from C2.Backend.utils.logging_config import loggers
-from C2.Backend.protocols.http_server import run_http_server, run_https_server
-from C2.Backend.protocols.smb_server import start_smb_server
-from C2.Backend.protocols.dns_server import start_dns_server
-from C2.Backend.protocols.icmp_server import start_icmp_server
 
 # Logger instance for C2 server
 logger = loggers["c2server"]
 
+# Threads of the loop's default executor, used by every run_in_executor(None, ...)/to_thread
+# call (aiofiles, worker joins). The long-running SMB, DNS and ICMP servers get dedicated
+# threads instead, so this pool stays free for short blocking calls.
+# Defaults to the stdlib sizing, min(32, cpu_count + 4).
+THREAD_POOL_SIZE = int(os.getenv("C2_THREAD_POOL_SIZE", min(32, (os.cpu_count() or 1) + 4)))
+
+# One pool per process, shared by every ProtocolManager and reused across restarts;
+# it is only shut down when the process exits
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE, thread_name_prefix="c2-proto")
+atexit.register(EXECUTOR.shutdown, wait=False, cancel_futures=True)
+
+# Longest `stop_all` waits for the thread-based servers to observe `stop_event`
+THREAD_STOP_TIMEOUT = 5
+
+class StopEvent(threading.Event):
+    """
+    A threading.Event that is also selectable: its `fileno()` turns readable when the
+    event is set, so selector-driven servers can block without a timeout and still
+    wake the moment a shutdown is requested. Waiting with `wait()` works as usual.
+    """
+
+    def __init__(self):
+        """
+        Creates the event and the socketpair that signals it.
+        """
+        super().__init__()
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+
+    def fileno(self) -> int:
+        """
+        Returns the descriptor that is readable while the event is set.
+        """
+        return self._reader.fileno()
+
+    def set(self):
+        """
+        Sets the event and wakes every selector the event is registered with.
+        """
+        super().set()
+        try:
+            self._writer.send(b"\x00")
+        except BlockingIOError:
+            pass  # Buffer full of earlier wakeups; the reader is already readable
+
+    def clear(self):
+        """
+        Clears the event and drains pending wakeups.
+        """
+        super().clear()
+        try:
+            while self._reader.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
 class ProtocolManager:
     """
     Manages the lifecycle of multiple network communication protocols
@@ -26,7 +82,9 @@ class ProtocolManager:
 
     Features:
     - HTTP and HTTPS servers run as asyncio tasks.
-    - SMB, DNS, and ICMP servers run in separate threads using an executor.
+    - SMB, DNS, and ICMP servers each run in a dedicated daemon thread.
+    - All protocols run as children of one asyncio.TaskGroup, so a single
+      cancellation stops them all and the group waits for every child to finish.
     - Provides asynchronous methods to start and stop all protocols cleanly.
     """
 
@@ -34,22 +92,91 @@ class ProtocolManager:
         """
         Initializes the ProtocolManager instance.
 
-        - Creates a thread pool executor for running non-async protocols.
-        - Maintains a list of running protocol tasks.
+        - Uses the process-wide EXECUTOR (THREAD_POOL_SIZE threads) for short blocking calls.
+        - Keeps the task that owns the protocols' TaskGroup.
         - Uses an event (`stop_event`) to signal thread-based servers to stop.
         """
         self.loop = None  # Stores the current asyncio event loop
-        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=5)  # Thread pool for blocking protocols
-        self.protocol_tasks = []  # Stores active tasks (async and thread-based)
+        self.executor = EXECUTOR  # Default executor for short blocking calls
+        self.runner = None  # Task running `run()`, the TaskGroup owning all protocol tasks
         self.running = False  # Flag to track running status
-        self.stop_event = threading.Event()  # Event to signal threads to stop execution
+        self.stop_event = StopEvent()  # Event to signal threads to stop execution; wakes their selectors
+
+    async def run_blocking(self, server):
+        """
+        Runs a blocking protocol server in its own daemon thread until it returns.
+
+        When cancelled, sets `stop_event` and waits up to THREAD_STOP_TIMEOUT seconds
+        for the server thread to observe it before propagating the cancellation.
+
+        Args:
+            server (Callable[[StopEvent], None]): The server entry point.
+        """
+        future = self.loop.create_future()
+
+        def resolve(exception):
+            if not future.done():
+                if exception is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(exception)
+
+        def target():
+            exception = None
+            try:
+                server(self.stop_event)
+            except BaseException as e:
+                exception = e
+            try:
+                self.loop.call_soon_threadsafe(resolve, exception)
+            except RuntimeError:
+                pass  # Event loop already closed; nobody is waiting
+
+        name = server.__name__.removeprefix("start_")
+        threading.Thread(target=target, name=name, daemon=True).start()
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.stop_event.set()
+            _, pending = await asyncio.wait([future], timeout=THREAD_STOP_TIMEOUT)
+            if pending:
+                logger.error(f"{server.__name__} did not stop within {THREAD_STOP_TIMEOUT}s.")
+            raise
+
+    async def run(self):
+        """
+        Runs every protocol in one TaskGroup until they all return or the group is cancelled.
+
+        An unexpected exception in one protocol cancels the others and is logged here.
+        The protocol servers are imported here, on first start, so importing the manager
+        does not load uvicorn, Hypercorn, impacket and dnslib up front.
+        """
+        from C2.Backend.protocols.http_server import run_http_server, run_https_server
+        from C2.Backend.protocols.smb_server import start_smb_server
+        from C2.Backend.protocols.dns_server import start_dns_server
+        from C2.Backend.protocols.icmp_server import start_icmp_server
+
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                # HTTP and HTTPS servers as asyncio tasks
+                task_group.create_task(run_http_server())
+                task_group.create_task(run_https_server())
+
+                # SMB, DNS, and ICMP servers in separate threads
+                for server in (start_smb_server, start_dns_server, start_icmp_server):
+                    task_group.create_task(self.run_blocking(server))
+        except Exception as e:
+            logger.error(f"Protocol failure, stopping all protocols: {e!r}")
+        finally:
+            self.running = False
 
     async def start_all(self):
         """
         Asynchronously starts all protocols.
 
         - HTTP/HTTPS servers are executed as asyncio tasks.
-        - SMB, DNS, and ICMP servers are executed in separate threads using the executor.
+        - SMB, DNS, and ICMP servers are executed in dedicated threads.
+        - Installs the executor as the loop's default, so other blocking calls share one pool.
         - Ensures protocols do not start multiple times concurrently.
         """
         if self.running:
@@ -58,26 +185,11 @@ class ProtocolManager:
 
         logger.info("Starting all protocols...")
         self.loop = asyncio.get_running_loop()
+        self.loop.set_default_executor(self.executor)
         self.stop_event.clear()  # Ensure previous stop signals are cleared
 
-        # Start HTTP and HTTPS servers as asyncio tasks
-        http_server_task = asyncio.create_task(run_http_server())
-        https_server_task = asyncio.create_task(run_https_server())
-
-        # Start SMB, DNS, and ICMP servers in separate threads
-        smb_server_future = self.loop.run_in_executor(self.executor, start_smb_server, self.stop_event)
-        dns_server_future = self.loop.run_in_executor(self.executor, start_dns_server, self.stop_event)
-        icmp_server_future = self.loop.run_in_executor(self.executor, start_icmp_server, self.stop_event)
-
-        # Track running protocol tasks
-        self.protocol_tasks = [
-            http_server_task,
-            https_server_task,
-            smb_server_future,
-            dns_server_future,
-            icmp_server_future
-        ]
         self.running = True
+        self.runner = asyncio.create_task(self.run())
         logger.info("All protocols started in background.")
 
     async def stop_all(self):
@@ -85,8 +197,8 @@ class ProtocolManager:
         Asynchronously stops all running protocols.
 
         - Signals `stop_event` to terminate thread-based protocols.
-        - Cancels all asyncio-based tasks.
-        - Ensures a short delay to allow thread-based protocols to exit gracefully.
+        - Cancels the protocols' TaskGroup, which cancels every protocol task and waits
+          (up to THREAD_STOP_TIMEOUT seconds per thread) for them to exit.
         - Resets state variables for future restarts.
         """
         if not self.running:
@@ -98,16 +210,11 @@ class ProtocolManager:
         # Signal thread-based servers to terminate
         self.stop_event.set()
 
-        # Cancel asyncio-based tasks
-        for task in self.protocol_tasks:
-            if isinstance(task, asyncio.Task):
-                task.cancel()
-
-        # Allow thread-based servers time to terminate gracefully
-        await asyncio.sleep(1)
+        # Cancel the group and wait until every protocol has unwound
+        self.runner.cancel()
+        await asyncio.gather(self.runner, return_exceptions=True)
 
-        # Clear tracked tasks and reset running state
-        self.protocol_tasks.clear()
+        self.runner = None
         self.running = False
         logger.info("All protocols stopped.")
 
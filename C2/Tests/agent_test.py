@@ -7,34 +7,45 @@ authentication, listing, and generation endpoints.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Make sure the BASE_URL is set to the same port as your server (here: port 8000)
 BASE_URL = "http://localhost:8000/api"
 
+# Shared session: every call reuses pooled keep-alive connections, and connection
+# failures are retried with a short backoff instead of failing the run outright
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.1),
+))
+
 def test_registration():
     agent_id = "agent_test_500"
     url = f"{BASE_URL}/agent/register"
     data = {"agent_id": agent_id}
     print("Using BASE_URL:", BASE_URL)
-    response = requests.post(url, json=data)
+    response = SESSION.post(url, json=data)
     print("Registration response:", response.status_code, response.json())
     return agent_id, response.json().get("auth_token")
 
 def test_authentication(agent_id, auth_token):
     url = f"{BASE_URL}/agent/authenticate"
     data = {"agent_id": agent_id, "auth_token": auth_token}
-    response = requests.post(url, json=data)
+    response = SESSION.post(url, json=data)
     print("Authentication response:", response.status_code, response.json())
 
 def test_list_agents():
     url = f"{BASE_URL}/agent/list"
-    response = requests.get(url)
+    response = SESSION.get(url)
     print("List agents response:", response.status_code, response.json())
 
 def test_generate_agent(agent_id, mode):
     url = f"{BASE_URL}/agent/generate"
     data = {"agent_id": agent_id, "mode": mode}
-    response = requests.post(url, json=data)
+    response = SESSION.post(url, json=data)
     print("Generate agent response:", response.status_code, response.json())
 
 if __name__ == "__main__":
@@ -7,20 +7,51 @@ Provides basic controls to check server status, start/stop/restart protocols, fe
 and generate agents (file-based or fileless) based on operator choice.
 """
 
+import sys
 import asyncio
+import orjson
+import httpx
 import websockets
-import requests
-import threading
 
 # Base API and WebSocket URLs
 BASE_URL = "http://localhost:8000/api"
 WS_URL = "ws://localhost:8000/ws/logs"
 
-def send_request(endpoint, method="GET", data=None):
+# Connection failures are retried this many times before a request gives up
+CONNECT_RETRIES = 3
+
+# Log lines buffered between the WebSocket reader and the console writer; when full,
+# the reader stops receiving and the server sees TCP backpressure
+LOG_QUEUE_SIZE = 1024
+
+# Menu text, written as-is on every loop iteration
+MENU = (
+    "\nC2 Admin API Test Console\n"
+    "1. Check server status\n"
+    "2. Start protocols\n"
+    "3. Stop protocols\n"
+    "4. Restart protocols\n"
+    "5. Get config\n"
+    "6. Generate agent\n"
+    "7. Exit\n"
+    "Select an option: "
+)
+
+# Menu options that map straight onto one API request: option -> (endpoint, method)
+REQUEST_ACTIONS = {
+    "1": ("status", "GET"),
+    "2": ("control/start", "POST"),
+    "3": ("control/stop", "POST"),
+    "4": ("control/restart", "POST"),
+    "5": ("config", "GET"),
+}
+
+async def send_request(client, endpoint, method="GET", data=None):
     """
     Sends an HTTP request to the C2 API.
 
     Args:
+        client (httpx.AsyncClient): Shared client; every console action reuses its pooled connection.
         endpoint (str): API endpoint to send the request to.
         method (str): HTTP method (default is "GET").
         data (dict, optional): JSON payload for POST requests.
@@ -28,90 +59,105 @@ def send_request(endpoint, method="GET", data=None):
     Returns:
         None
     """
-    url = f"{BASE_URL}/{endpoint}"
     try:
         if method == "GET":
-            response = requests.get(url)
+            response = await client.get(endpoint)
         elif method == "POST":
-            response = requests.post(url, json=data)
+            response = await client.post(endpoint, json=data)
         else:
             print("Unsupported method")
             return
-        print(f"Response: {response.status_code} - {response.json()}")
-    except requests.RequestException as e:
+        print(f"Response: {response.status_code} - {orjson.loads(response.content)}")
+    except httpx.HTTPError as e:
         print(f"Request failed: {e}")
 
-def listen_to_logs():
+async def log_listener(queue: asyncio.Queue):
     """
-    Listens to real-time logs from the C2 WebSocket stream and prints received log messages.
+    Listens to real-time logs from the C2 WebSocket stream and queues received log messages.
+
+    Args:
+        queue (asyncio.Queue): Bounded queue consumed by `log_writer`.
     """
-    async def log_listener():
-        async with websockets.connect(WS_URL) as ws:
-            try:
-                while True:
-                    message = await ws.recv()
-                    print(f"[LOG] {message}")
-            except websockets.exceptions.ConnectionClosed:
-                print("Log stream disconnected.")
-
-    asyncio.run(log_listener())
-
-def start_log_listener():
+    async with websockets.connect(WS_URL) as ws:
+        try:
+            while True:
+                await queue.put(await ws.recv())
+        except websockets.exceptions.ConnectionClosed:
+            await queue.put("Log stream disconnected.")
+
+async def log_writer(queue: asyncio.Queue):
     """
-    Starts the log listener in a separate daemon thread.
+    Prints queued log messages, writing everything queued so far in one batch.
+
+    Args:
+        queue (asyncio.Queue): Queue filled by `log_listener`.
     """
-    thread = threading.Thread(target=listen_to_logs, daemon=True)
-    thread.start()
+    while True:
+        batch = [await queue.get()]
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        sys.stdout.write("".join(f"[LOG] {message}\n" for message in batch))
+        sys.stdout.flush()
 
-def generate_agent_request():
+async def generate_agent_request(client):
     """
     Prompts the operator for agent parameters and sends a request to generate an agent.
     This functionality lets the operator choose between a file-based agent or a fileless (in-memory) agent.
+
+    Args:
+        client (httpx.AsyncClient): Shared client for the C2 API.
     """
     print("\n--- Agent Generation ---")
-    agent_id = input("Enter agent ID: ")
-    mode = input("Enter mode ('file' for file-based, 'fileless' for in-memory loader): ")
+    agent_id = await asyncio.to_thread(input, "Enter agent ID: ")
+    mode = await asyncio.to_thread(input, "Enter mode ('file' for file-based, 'fileless' for in-memory loader): ")
     # Additional configuration parameters can be collected here as needed.
     payload = {
         "agent_id": agent_id,
         "mode": mode
     }
-    send_request("agent/generate", method="POST", data=payload)
+    await send_request(client, "agent/generate", method="POST", data=payload)
 
-def main():
+async def main():
     """
     Entry point for the C2 Admin API Test Console.
+
+    The log stream runs as tasks on the same event loop as the menu; blocking
+    prompts are moved off the loop and HTTP requests are awaited, so logs keep flowing.
+    """
+    transport = httpx.AsyncHTTPTransport(retries=CONNECT_RETRIES)
+    async with httpx.AsyncClient(base_url=f"{BASE_URL}/", transport=transport) as client:
+        await console(client)
+
+async def console(client):
     """
-    start_log_listener()
+    Runs the operator menu until the operator exits.
+
+    Args:
+        client (httpx.AsyncClient): Shared client for the C2 API.
+    """
+    log_queue = asyncio.Queue(maxsize=LOG_QUEUE_SIZE)
+    log_tasks = [asyncio.create_task(log_listener(log_queue)), asyncio.create_task(log_writer(log_queue))]
     while True:
-        print("\nC2 Admin API Test Console")
-        print("1. Check server status")
-        print("2. Start protocols")
-        print("3. Stop protocols")
-        print("4. Restart protocols")
-        print("5. Get config")
-        print("6. Generate agent")
-        print("7. Exit")
-
-        choice = input("Select an option: ")
-
-        if choice == "1":
-            send_request("status")
-        elif choice == "2":
-            send_request("control/start", method="POST")
-        elif choice == "3":
-            send_request("control/stop", method="POST")
-        elif choice == "4":
-            send_request("control/restart", method="POST")
-        elif choice == "5":
-            send_request("config")
+        sys.stdout.write(MENU)
+        sys.stdout.flush()
+        line = await asyncio.to_thread(sys.stdin.readline)
+        if not line:
+            break  # stdin closed (piped input exhausted)
+        choice = line.strip()
+
+        if choice in REQUEST_ACTIONS:
+            endpoint, method = REQUEST_ACTIONS[choice]
+            await send_request(client, endpoint, method=method)
         elif choice == "6":
-            generate_agent_request()
+            await generate_agent_request(client)
         elif choice == "7":
             print("Exiting...")
             break
         else:
             print("Invalid choice. Please try again.")
 
+    for task in log_tasks:
+        task.cancel()
+
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
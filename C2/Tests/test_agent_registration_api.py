@@ -6,24 +6,28 @@ Provides functions to register, authenticate, and list agents via HTTP requests.
 """
 #!/usr/bin/env python3
 
-import requests
+import asyncio
+import httpx
 
 # Base URL for the agent API
 BASE_URL = 'http://127.0.0.1:8000/api/agent'
 
-def register_agent(agent_id: str) -> str:
+# Connection failures are retried this many times before a call gives up
+CONNECT_RETRIES = 3
+
+async def register_agent(client: httpx.AsyncClient, agent_id: str) -> str:
     """
     Registers an Agent by calling the /register endpoint.
 
     Args:
+        client (httpx.AsyncClient): Shared client for the C2 API.
         agent_id (str): The unique identifier of the agent.
 
     Returns:
         str: Authentication token if registration is successful, empty string otherwise.
     """
-    url = f"{BASE_URL}/register"
     payload = {"agent_id": agent_id}
-    response = requests.post(url, json=payload)
+    response = await client.post("/register", json=payload)
     if response.status_code == 200:
         data = response.json()
         print(f'Agent {agent_id} registered')
@@ -32,25 +36,27 @@ def register_agent(agent_id: str) -> str:
         print(f'Agent {agent_id} registration failed')
         return ""
 
-def authenticate_agent(agent_id: str, auth_token: str):
+async def authenticate_agent(client: httpx.AsyncClient, agent_id: str, auth_token: str):
     """
     Authenticates an Agent by calling the /authenticate endpoint.
 
     Args:
+        client (httpx.AsyncClient): Shared client for the C2 API.
         agent_id (str): The unique identifier of the agent.
         auth_token (str): The authentication token provided during registration.
     """
-    url = f"{BASE_URL}/authenticate"
     payload = {"agent_id": agent_id, "auth_token": auth_token}
-    response = requests.post(url, json=payload)
+    response = await client.post("/authenticate", json=payload)
     print("Authentication response: ", response.status_code, response.json())
 
-def list_agents():
+async def list_agents(client: httpx.AsyncClient):
     """
     Retrieves and prints the list of registered agents by calling the /list endpoint.
+
+    Args:
+        client (httpx.AsyncClient): Shared client for the C2 API.
     """
-    url = f"{BASE_URL}/list"
-    response = requests.get(url)
+    response = await client.get("/list")
     if response.status_code == 200:
         data = response.json()
         print('Agent list: ')
@@ -59,9 +65,21 @@ def list_agents():
     else:
         print("Error listing agents:", response.status_code, response.text)
 
+async def main(agent_id: str):
+    """
+    Registers `agent_id`, then authenticates it and lists agents concurrently,
+    since neither of those calls depends on the other.
+
+    Args:
+        agent_id (str): The unique identifier of the test agent.
+    """
+    transport = httpx.AsyncHTTPTransport(retries=CONNECT_RETRIES)
+    async with httpx.AsyncClient(base_url=BASE_URL, transport=transport) as client:
+        auth_token = await register_agent(client, agent_id)
+        calls = [list_agents(client)]
+        if auth_token:
+            calls.append(authenticate_agent(client, agent_id, auth_token))
+        await asyncio.gather(*calls)
+
 if __name__ == '__main__':
-    test_agent_id = 'agent_001'
-    auth_token = register_agent(test_agent_id)
-    if auth_token:
-        authenticate_agent(test_agent_id, auth_token)
-    list_agents()
+    asyncio.run(main('agent_001'))
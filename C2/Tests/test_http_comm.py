@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+C2.Tests.test_http_comm.py
+
+Offline checks for the agent's HTTPComm retry handling. No server is needed;
+responses are built locally. Run from the repository root with
+`python -m C2.Tests.test_http_comm`.
+"""
+
+import os
+import sys
+import httpx
+
+# HTTPComm imports its sibling modules by bare name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Agent", "protocols"))
+
+from Agent.protocols.http_comm import HTTPComm, RETRY_BACKOFF, RETRY_MAX_DELAY
+
+def test_retry_after_is_capped():
+    response = httpx.Response(503, headers={"Retry-After": "86400"})
+    assert HTTPComm._retry_delay(response, 0) == RETRY_MAX_DELAY
+
+def test_retry_after_below_cap_is_honored():
+    response = httpx.Response(503, headers={"Retry-After": "2"})
+    assert HTTPComm._retry_delay(response, 0) == 2.0
+
+def test_backoff_without_retry_after():
+    response = httpx.Response(503)
+    assert HTTPComm._retry_delay(response, 2) == RETRY_BACKOFF * 4
+
+if __name__ == "__main__":
+    test_retry_after_is_capped()
+    test_retry_after_below_cap_is_honored()
+    test_backoff_without_retry_after()
+    print("HTTPComm retry tests passed.")
@@ -1,34 +1,68 @@
 """
 Tests.watch_db.py
 
-A utility script that periodically retrieves and displays the list of registered agents from the database.
+A utility script that displays the list of registered agents from the database.
 It continuously monitors changes in agent records and prints them to the console.
 """
 #!/usr/bin/env python3
 
-import time
-from C2.Backend.API.agent_manager_pg import list_agents
+import sys
+import asyncio
+from C2.Backend.API.agent_manager_pg import iter_agents, watch_agent_changes
 
-def watch_agents(interval: int = 5):
+# Agents formatted per console write while printing the initial list
+WRITE_BATCH = 1000
+
+def write_lines(lines):
     """
-    Periodically retrieves and prints the list of agents from the database.
+    Writes lines to the console with one write and one flush.
 
     Args:
-        interval (int): Time interval (in seconds) between queries. Default is 5 seconds.
+        lines (list[str]): Lines to write, without trailing newlines.
+    """
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+async def watch_agents():
     """
+    Prints the current list of agents once, written WRITE_BATCH lines at a time as rows
+    stream in, then each change as the database announces it.
+
+    Changes are pushed over LISTEN/NOTIFY, so the watcher stays idle (and the table
+    is not re-queried) while nothing changes. The listener is started before the
+    list is read; changes made while it is being printed are buffered and replayed
+    afterwards, so none fall between the snapshot and the subscription.
+    """
+    listening = asyncio.Event()
+    changes = watch_agent_changes(listening)
+    first_change = asyncio.create_task(anext(changes))
+    listening_wait = asyncio.create_task(listening.wait())
+    await asyncio.wait({first_change, listening_wait}, return_when=asyncio.FIRST_COMPLETED)
+    listening_wait.cancel()
+    if first_change.done():
+        first_change.result()  # Re-raises a failure to start listening
+
+    lines = ["----- Current Agents in DB -----"]
+    count = 0
+    async for agent in iter_agents():
+        lines.append(str(agent))
+        count += 1
+        if len(lines) >= WRITE_BATCH:
+            write_lines(lines)
+            lines = []
+    if not count:
+        lines.append("No agents registered.")
+    lines.append("--------------------------------")
+    write_lines(lines)
+
+    change = await first_change
+    while True:
+        op = change.pop("op")
+        write_lines([f"[{op}] {change}"])
+        change = await anext(changes)
+
+if __name__ == "__main__":
     try:
-        while True:
-            agents = list_agents()
-            print("----- Current Agents in DB -----")
-            if not agents:
-                print("No agents registered.")
-            else:
-                for agent in agents:
-                    print(agent)
-            print("--------------------------------")
-            time.sleep(interval)
+        asyncio.run(watch_agents())
     except KeyboardInterrupt:
         print("Stopped watching the database.")
-
-if __name__ == "__main__":
-    watch_agents()